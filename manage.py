@@ -2,8 +2,10 @@ import argparse
 import uvicorn
 import asyncio
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.data import AsyncSessionLocal
+from src.data import AsyncSessionLocal, init_db, rebuild_rollups
 from src.utils.seed import seed_expenses
+from src.utils.importer import import_expenses
+from src.utils.bench import run_benchmark, write_report, budget_violations
 
 
 def runserver(host: str, port: int, reload: bool):
@@ -12,10 +14,69 @@ def runserver(host: str, port: int, reload: bool):
     uvicorn.run("src.web.main:app", host=host, port=port, reload=reload)
 
 
-async def seed_fake_expenses(expenses: int):
+async def seed_fake_expenses(
+    expenses: int, users: int, seed: int, workers: int, chunk_size: int
+):
     """Creates a new database session and seeds expenses."""
+    await init_db()
     async with AsyncSessionLocal() as db:
-        await seed_expenses(db, num_expenses=expenses)
+        await seed_expenses(
+            db,
+            num_expenses=expenses,
+            num_users=users,
+            seed=seed,
+            workers=workers,
+            chunk_size=chunk_size,
+        )
+
+
+async def migrate():
+    """Creates missing tables, columns and indexes on the configured database."""
+    await init_db()
+
+
+async def rebuild_stats():
+    """Recomputes the monthly and daily expense totals from the expenses table."""
+    await init_db()
+    async with AsyncSessionLocal() as db:
+        await rebuild_rollups(db)
+
+
+async def import_file(
+    username: str, path: str, chunk_size: int, file_format: str, restart: bool
+):
+    """Imports expenses for a user from a CSV or OFX file."""
+    await init_db()
+    async with AsyncSessionLocal() as db:
+        await import_expenses(
+            db,
+            username,
+            path,
+            chunk_size=chunk_size,
+            file_format=file_format,
+            restart=restart,
+        )
+
+
+async def bench(args):
+    """Benchmarks every route against a throwaway seeded database."""
+    report = await run_benchmark(
+        rows=args.rows,
+        users=args.users,
+        seed=args.seed,
+        workers=args.workers,
+        requests=args.requests,
+        auth_requests=args.auth_requests,
+        concurrency=args.concurrency,
+        routes=args.route,
+        keep=args.keep,
+        compare_serialization=args.compare_serialization,
+    )
+    write_report(report, args.output)
+    if args.check_budgets:
+        violations = budget_violations(report)
+        if violations:
+            raise SystemExit(f"Over query budget: {', '.join(violations)}")
 
 
 def parse_args():
@@ -38,10 +99,114 @@ def parse_args():
 
     # seed command
     seed_parser = subparsers.add_parser(
-        "seed", help="Seed the database with fake expenses"
+        "seed",
+        help="Seed the database with fake expenses; do not run it against a "
+        "live server",
     )
     seed_parser.add_argument(
-        "--expense", type=int, default=100, help="Number of expenses to seed"
+        "--rows",
+        "--expense",
+        dest="rows",
+        type=int,
+        default=100,
+        help="Number of expenses to seed",
+    )
+    seed_parser.add_argument(
+        "--users",
+        type=int,
+        default=None,
+        help="Number of seed users to spread expenses over (default: all users)",
+    )
+    seed_parser.add_argument(
+        "--seed", type=int, default=0, help="Random seed for reproducible data"
+    )
+    seed_parser.add_argument(
+        "--workers", type=int, default=1, help="Number of generator processes"
+    )
+    seed_parser.add_argument(
+        "--chunk-size", type=int, default=5000, help="Rows to insert per batch"
+    )
+
+    # migrate command
+    subparsers.add_parser(
+        "migrate",
+        help="Create missing tables, columns and indexes in an existing database",
+    )
+
+    # rebuild-stats command
+    subparsers.add_parser(
+        "rebuild-stats", help="Recompute the monthly and daily expense totals"
+    )
+
+    # import command
+    import_parser = subparsers.add_parser(
+        "import", help="Import expenses for a user from a CSV or OFX file"
+    )
+    import_parser.add_argument("file", type=str, help="Path to the file to import")
+    import_parser.add_argument(
+        "--user", type=str, required=True, help="Username to import expenses for"
+    )
+    import_parser.add_argument(
+        "--format",
+        choices=["csv", "ofx"],
+        default=None,
+        help="File format (detected from the extension by default)",
+    )
+    import_parser.add_argument(
+        "--chunk-size", type=int, default=1000, help="Rows to insert per commit"
+    )
+    import_parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Import the file from the start even if it was imported before",
+    )
+
+    # bench command
+    bench_parser = subparsers.add_parser(
+        "bench", help="Benchmark every route against a throwaway database"
+    )
+    bench_parser.add_argument(
+        "--rows", type=int, default=100000, help="Number of expenses to seed"
+    )
+    bench_parser.add_argument(
+        "--users", type=int, default=10, help="Number of users to seed"
+    )
+    bench_parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    bench_parser.add_argument(
+        "--workers", type=int, default=1, help="Number of seeding processes"
+    )
+    bench_parser.add_argument(
+        "--requests", type=int, default=200, help="Requests per route"
+    )
+    bench_parser.add_argument(
+        "--auth-requests",
+        type=int,
+        default=20,
+        help="Requests for the register, login and logout routes",
+    )
+    bench_parser.add_argument(
+        "--concurrency", type=int, default=10, help="Concurrent requests"
+    )
+    bench_parser.add_argument(
+        "--route",
+        action="append",
+        help="Only benchmark this route (e.g. 'GET /expense/'), repeatable",
+    )
+    bench_parser.add_argument(
+        "--output", type=str, default=None, help="Write the JSON report to a file"
+    )
+    bench_parser.add_argument(
+        "--keep", action="store_true", help="Keep the benchmark database"
+    )
+    bench_parser.add_argument(
+        "--check-budgets",
+        action="store_true",
+        help="Exit with an error if a route exceeds its query budget",
+    )
+    bench_parser.add_argument(
+        "--compare-serialization",
+        action="store_true",
+        help="Also run list routes through the response model serialization",
     )
 
     return parser.parse_args()
@@ -53,5 +218,24 @@ if __name__ == "__main__":
     if args.command == "runserver":
         runserver(host=args.host, port=args.port, reload=args.reload)
     elif args.command == "seed":
-        print(f"Seeding {args.expense} expenses...")
-        asyncio.run(seed_fake_expenses(args.expense))
+        print(f"Seeding {args.rows} expenses...")
+        asyncio.run(
+            seed_fake_expenses(
+                args.rows, args.users, args.seed, args.workers, args.chunk_size
+            )
+        )
+    elif args.command == "migrate":
+        print("Upgrading database schema...")
+        asyncio.run(migrate())
+    elif args.command == "rebuild-stats":
+        print("Rebuilding monthly and daily expense totals...")
+        asyncio.run(rebuild_stats())
+        print("Done.")
+    elif args.command == "bench":
+        asyncio.run(bench(args))
+    elif args.command == "import":
+        asyncio.run(
+            import_file(
+                args.user, args.file, args.chunk_size, args.format, args.restart
+            )
+        )
@@ -1,14 +1,77 @@
-from .user import User, AccessToken
-from .expense import Expense, ExpenseCategory
-from .database import init_db, get_db, engine, AsyncSessionLocal
+from .user import User, AccessToken, TokenRevocation
+from .expense import (
+    Expense,
+    ExpenseCategory,
+    ExpenseMonthlyTotal,
+    ExpenseDailyTotal,
+    normalize_category_name,
+)
+from .import_job import ImportJob
+from .search import (
+    expenses_fts,
+    fulltext_search_enabled,
+    build_match_query,
+    suspend_fulltext_sync,
+    resume_fulltext_sync,
+)
+from .rollup import (
+    rollups_enabled,
+    rebuild_rollups,
+    suspend_rollup_sync,
+    resume_rollup_sync,
+)
+from .versions import (
+    data_versions_enabled,
+    suspend_version_sync,
+    resume_version_sync,
+)
+from .database import (
+    init_db,
+    upgrade_columns,
+    upgrade_indexes,
+    category_upsert_enabled,
+    use_database,
+    get_db,
+    get_read_db,
+    dispose_engines,
+    engine,
+    read_engine,
+    AsyncSessionLocal,
+    AsyncReadSessionLocal,
+)
 
 __all__ = [
     "User",
     "Expense",
     "ExpenseCategory",
+    "ExpenseMonthlyTotal",
+    "ExpenseDailyTotal",
+    "normalize_category_name",
     "init_db",
+    "upgrade_columns",
+    "upgrade_indexes",
+    "category_upsert_enabled",
+    "use_database",
     "get_db",
+    "get_read_db",
+    "dispose_engines",
     "engine",
+    "read_engine",
     "AsyncSessionLocal",
+    "AsyncReadSessionLocal",
     "AccessToken",
+    "TokenRevocation",
+    "ImportJob",
+    "expenses_fts",
+    "fulltext_search_enabled",
+    "build_match_query",
+    "suspend_fulltext_sync",
+    "resume_fulltext_sync",
+    "rollups_enabled",
+    "rebuild_rollups",
+    "suspend_rollup_sync",
+    "resume_rollup_sync",
+    "data_versions_enabled",
+    "suspend_version_sync",
+    "resume_version_sync",
 ]
@@ -1,11 +1,173 @@
+import logging
+import time
+
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.schema import CreateColumn, CreateIndex
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from src.utils.config import settings
+from src.utils.statements import install_statement_counting
+from src.utils.metrics import (
+    current_request_timings,
+    db_pool_checkout_wait,
+    db_query_duration,
+    db_slow_queries,
+)
+from .search import init_fulltext_search
+from .rollup import init_rollups
+from .versions import init_data_versions
+
+logger = logging.getLogger(__name__)
+
+DATABASE_URL = settings.DATABASE_URL
+DATABASE_READ_URL = settings.DATABASE_READ_URL
+
+_state = {"category_upsert": False}
+
+
+def category_upsert_enabled() -> bool:
+    """Whether the unique index that category upserts conflict on exists."""
+    return _state["category_upsert"]
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    """Tunes every new SQLite connection according to the settings."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA journal_mode = {settings.SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous = {settings.SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA cache_size = {int(settings.SQLITE_CACHE_SIZE)}")
+    cursor.execute(f"PRAGMA mmap_size = {int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.execute(f"PRAGMA temp_store = {settings.SQLITE_TEMP_STORE}")
+    cursor.execute("PRAGMA foreign_keys = ON")
+    cursor.close()
+
+
+def _apply_sqlite_read_pragmas(dbapi_connection, connection_record):
+    """Tunes a read-only SQLite connection; the journal mode is left alone."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA busy_timeout = {int(settings.SQLITE_BUSY_TIMEOUT_MS)}")
+    cursor.execute(f"PRAGMA cache_size = {int(settings.SQLITE_CACHE_SIZE)}")
+    cursor.execute(f"PRAGMA mmap_size = {int(settings.SQLITE_MMAP_SIZE)}")
+    cursor.execute(f"PRAGMA temp_store = {settings.SQLITE_TEMP_STORE}")
+    cursor.execute("PRAGMA query_only = ON")
+    cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """Records a statement's duration for the request and the metrics."""
+    started = conn.info["query_started"].pop()
+    elapsed = time.perf_counter() - started
+    db_query_duration.observe(elapsed)
+
+    timings = current_request_timings()
+    if timings is not None:
+        timings.db_queries += 1
+        timings.db_seconds += elapsed
+
+    if elapsed * 1000 >= settings.SLOW_QUERY_THRESHOLD_MS:
+        db_slow_queries.inc()
+        logger.warning(
+            "Slow query (%.1f ms): %s", elapsed * 1000, " ".join(statement.split())
+        )
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long checkouts wait for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_checkout_wait.observe(
+                time.perf_counter() - started,
+                engine=self._orig_logging_name or "primary",
+            )
+
+
+def _is_file_database(url: str) -> bool:
+    database = make_url(url).database
+    return bool(database) and database != ":memory:" and "mode=memory" not in url
+
+
+def create_engine_from_settings(url: str = DATABASE_URL, read_only: bool = False):
+    """Creates an async engine configured from the settings.
+
+    File-backed databases get a connection pool sized by the settings, and
+    SQLite connections have the configured pragmas applied as they open.
+    """
+    options = {}
+    if _is_file_database(url):
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_logging_name="read" if read_only else "primary",
+            pool_size=settings.DATABASE_POOL_SIZE,
+            max_overflow=settings.DATABASE_MAX_OVERFLOW,
+            pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        )
+
+    new_engine = create_async_engine(url, echo=False, **options)
+    install_statement_counting(new_engine)
+    event.listen(
+        new_engine.sync_engine, "before_cursor_execute", _before_cursor_execute
+    )
+    event.listen(new_engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(new_engine.sync_engine, "handle_error", _handle_error)
+    if new_engine.dialect.name == "sqlite":
+        listener = _apply_sqlite_read_pragmas if read_only else _apply_sqlite_pragmas
+        event.listen(new_engine.sync_engine, "connect", listener)
+    return new_engine
+
 
+def read_only_url(url: str) -> str | None:
+    """Returns a `mode=ro` URI for a file-backed SQLite database URL.
 
-DATABASE_URL = "sqlite+aiosqlite:///./database.db"
+    Returns None for other databases, which need an explicit read URL
+    (such as a replica) to get a separate read engine.
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite" or not _is_file_database(url):
+        return None
+    if parsed.database.startswith("file:"):
+        database = parsed.database
+    else:
+        database = f"file:{parsed.database}"
+    return parsed.set(
+        database=database, query={**parsed.query, "mode": "ro", "uri": "true"}
+    ).render_as_string(hide_password=False)
 
-engine = create_async_engine(DATABASE_URL, echo=False)
+
+def create_read_engine(url: str = DATABASE_URL, read_url: str | None = None):
+    """Creates the engine used by read-only sessions.
+
+    Uses `read_url` when given, otherwise a read-only connection to the
+    primary SQLite file. Under WAL those readers never wait for a writer.
+    Falls back to the primary engine when no read-only URL can be derived.
+    """
+    read_url = read_url or read_only_url(url)
+    if read_url is None:
+        return None
+    return create_engine_from_settings(read_url, read_only=True)
+
+
+engine = create_engine_from_settings()
+read_engine = create_read_engine(read_url=DATABASE_READ_URL) or engine
 
 AsyncSessionLocal = sessionmaker(
     bind=engine,
@@ -13,6 +175,34 @@ AsyncSessionLocal = sessionmaker(
     expire_on_commit=False,
 )
 
+AsyncReadSessionLocal = sessionmaker(
+    bind=read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autoflush=False,
+)
+
+
+def use_database(url: str, read_url: str | None = None):
+    """Points the engines and the session factories at another database.
+
+    Used by tooling such as `manage.py bench` to work on a throwaway
+    database. Returns the new primary engine.
+    """
+    global engine, read_engine
+    engine = create_engine_from_settings(url)
+    read_engine = create_read_engine(url, read_url) or engine
+    AsyncSessionLocal.configure(bind=engine)
+    AsyncReadSessionLocal.configure(bind=read_engine)
+    return engine
+
+
+async def dispose_engines():
+    """Closes the pooled connections of the primary and read engines."""
+    if read_engine is not engine:
+        await read_engine.dispose()
+    await engine.dispose()
+
 
 class Base(AsyncAttrs, DeclarativeBase):
     pass
@@ -24,7 +214,103 @@ async def get_db():
         yield session
 
 
+async def get_read_db():
+    """Generates an async session on the read-only engine"""
+    async with AsyncReadSessionLocal() as session:
+        yield session
+
+
 async def init_db():
     """Initialize database"""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+    await upgrade_columns()
+    await upgrade_indexes()
+    await init_fulltext_search(engine)
+    await init_rollups(engine)
+    await init_data_versions(engine)
+
+
+async def upgrade_columns():
+    """Adds declared columns that are missing from existing tables.
+
+    Like indexes, columns declared after a table was created are never added
+    by `create_all`. Only columns that are nullable or have a server default
+    can be added this way.
+    """
+    async with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = await conn.run_sync(
+                lambda sync_conn: {
+                    column["name"]
+                    for column in inspect(sync_conn).get_columns(table.name)
+                }
+            )
+            for column in table.columns:
+                if column.name not in existing:
+                    ddl = CreateColumn(column).compile(dialect=conn.dialect)
+                    await conn.exec_driver_sql(
+                        f"ALTER TABLE {table.name} ADD COLUMN {ddl}"
+                    )
+
+
+async def _merge_duplicate_categories(conn) -> int:
+    """Merges categories of a user whose names differ only in case.
+
+    Databases created before category names were unique per user regardless
+    of case can hold both "Food" and "food". The expenses of every duplicate
+    move to the category with the lowest id and the duplicates are deleted,
+    so that the unique index on `lower(name)` can be created. The rollup
+    triggers move the totals along. Returns the number of categories merged.
+    """
+    result = await conn.exec_driver_sql(
+        """
+        SELECT id, keep_id FROM (
+            SELECT id, MIN(id) OVER (PARTITION BY user_id, lower(name)) AS keep_id
+            FROM expense_categories
+        )
+        WHERE id <> keep_id
+        """
+    )
+    duplicates = [tuple(row) for row in result]
+    if not duplicates:
+        return 0
+
+    await conn.exec_driver_sql(
+        "UPDATE expenses SET category_id = ? WHERE category_id = ?",
+        [(keep_id, duplicate_id) for duplicate_id, keep_id in duplicates],
+    )
+    await conn.exec_driver_sql(
+        "DELETE FROM expense_categories WHERE id = ?",
+        [(duplicate_id,) for duplicate_id, _ in duplicates],
+    )
+    logger.warning(
+        "Merged %d expense categories that differed only in case", len(duplicates)
+    )
+    return len(duplicates)
+
+
+async def upgrade_indexes():
+    """Creates declared indexes that are missing from existing tables.
+
+    `create_all` skips tables that already exist, together with their
+    indexes, so databases created before an index was declared never get it.
+    Case-duplicate categories are merged first. A unique index that the
+    existing rows still violate fails startup, since the code relies on it.
+    """
+    async with engine.begin() as conn:
+        await _merge_duplicate_categories(conn)
+
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            try:
+                async with engine.begin() as conn:
+                    await conn.execute(CreateIndex(index, if_not_exists=True))
+            except IntegrityError as e:
+                raise RuntimeError(
+                    f"Could not create unique index {index.name} on {table.name}: "
+                    f"existing rows violate it ({e.orig}). Remove the duplicate "
+                    "rows and run `python manage.py migrate` again."
+                ) from e
+
+    _state["category_upsert"] = engine.dialect.name == "sqlite"
@@ -1,6 +1,7 @@
+import string
 from datetime import datetime, timezone
 
-from sqlalchemy import DateTime, func
+from sqlalchemy import DateTime, Index, String, func
 from sqlalchemy import ForeignKey
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from typing import List, TYPE_CHECKING
@@ -49,6 +50,18 @@ class Expense(Base):
     """
 
     __tablename__ = "expenses"
+    __table_args__ = (
+        Index("ix_expenses_user_id_created_at_id", "user_id", "created_at", "id"),
+        Index(
+            "ix_expenses_user_id_category_id_created_at_id",
+            "user_id",
+            "category_id",
+            "created_at",
+            "id",
+        ),
+        Index("ix_expenses_category_id", "category_id"),
+        Index("ix_expenses_user_id_amount_id", "user_id", "amount", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     description: Mapped[str] = mapped_column(nullable=False)
@@ -72,3 +85,77 @@ class Expense(Base):
     # Relationship with Category and User
     user: Mapped["User"] = relationship(back_populates="expenses")
     category: Mapped["ExpenseCategory"] = relationship(back_populates="expenses")
+
+
+class ExpenseMonthlyTotal(Base):
+    """Database model for per-user monthly expense totals by category.
+
+    Maintained by triggers on the `expenses` table (see `rollup.py`), so
+    monthly and per-category statistics never have to scan raw expenses.
+
+    Attributes:
+        user_id (int): Foreign key linking the totals to a user.
+        year_month (str): Month of the expenses, as `YYYY-MM`.
+        category_id (int): Foreign key linking the totals to a category.
+        count (int): Number of expenses in the month and category.
+        total (float): Sum of their amounts.
+    """
+
+    __tablename__ = "expense_monthly_totals"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    year_month: Mapped[str] = mapped_column(String(7), primary_key=True)
+    category_id: Mapped[int] = mapped_column(
+        ForeignKey("expense_categories.id", ondelete="CASCADE"), primary_key=True
+    )
+    count: Mapped[int] = mapped_column(default=0, nullable=False)
+    total: Mapped[float] = mapped_column(default=0, nullable=False)
+
+
+class ExpenseDailyTotal(Base):
+    """Database model for per-user daily expense totals by category.
+
+    Maintained by the same kind of triggers as `ExpenseMonthlyTotal`, for
+    analytics that bucket expenses by day, week or month.
+
+    Attributes:
+        user_id (int): Foreign key linking the totals to a user.
+        day (str): UTC day of the expenses, as `YYYY-MM-DD`.
+        category_id (int): Foreign key linking the totals to a category.
+        count (int): Number of expenses in the day and category.
+        total (float): Sum of their amounts.
+    """
+
+    __tablename__ = "expense_daily_totals"
+
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    day: Mapped[str] = mapped_column(String(10), primary_key=True)
+    category_id: Mapped[int] = mapped_column(
+        ForeignKey("expense_categories.id", ondelete="CASCADE"), primary_key=True
+    )
+    count: Mapped[int] = mapped_column(default=0, nullable=False)
+    total: Mapped[float] = mapped_column(default=0, nullable=False)
+
+
+# Category names are unique per user regardless of case. Declared outside the
+# class because it indexes an expression rather than plain columns.
+Index(
+    "uq_expense_categories_user_id_lower_name",
+    ExpenseCategory.user_id,
+    func.lower(ExpenseCategory.name),
+    unique=True,
+)
+
+_ASCII_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def normalize_category_name(name: str) -> str:
+    """Folds a category name the way the unique index does.
+
+    SQLite's lower() only folds ASCII letters, so this does the same.
+    """
+    return name.translate(_ASCII_LOWER)
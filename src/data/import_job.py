@@ -0,0 +1,41 @@
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from .database import Base
+
+
+class ImportJob(Base):
+    """Database model tracking the progress of a file import.
+
+    Attributes:
+        id (int): Primary key for the import job.
+        user_id (int): Foreign key linking the job to the importing user.
+        source (str): Name of the imported file.
+        checksum (str): SHA-256 of the file contents, used to resume a job.
+        rows_processed (int): Number of source rows covered by committed chunks.
+        rows_inserted (int): Number of expenses inserted so far.
+        completed (bool): Whether the whole file has been imported.
+        created_at (datetime): Timestamp when the job was started.
+        updated_at (datetime): Timestamp of the last committed chunk.
+    """
+
+    __tablename__ = "import_jobs"
+    __table_args__ = (Index("ix_import_jobs_user_id_checksum", "user_id", "checksum"),)
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    source: Mapped[str] = mapped_column(nullable=False)
+    checksum: Mapped[str] = mapped_column(String(64), nullable=False)
+    rows_processed: Mapped[int] = mapped_column(default=0, nullable=False)
+    rows_inserted: Mapped[int] = mapped_column(default=0, nullable=False)
+    completed: Mapped[bool] = mapped_column(default=False, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now()
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
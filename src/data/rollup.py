@@ -0,0 +1,135 @@
+from sqlalchemy import text
+
+# `expense_monthly_totals` and `expense_daily_totals` keep a count and sum of
+# expenses per user, period and category. The triggers below update them in
+# the same transaction as every insert, update and delete on `expenses`.
+
+
+def _rollup(name: str, table: str, column: str, period: str) -> dict:
+    """Builds the triggers and rebuild statements of one rollup table.
+
+    `period` is an SQL expression of `{}.created_at` that gives the period
+    an expense is counted in; the triggers are named `expenses_{name}_*`.
+    """
+    add = f"""
+        INSERT INTO {table} (user_id, {column}, category_id, count, total)
+        VALUES (new.user_id, {period.format("new")}, new.category_id, 1, new.amount)
+        ON CONFLICT (user_id, {column}, category_id) DO UPDATE
+        SET count = count + 1, total = total + excluded.total;
+    """
+    subtract = f"""
+        UPDATE {table}
+        SET count = count - 1, total = total - old.amount
+        WHERE user_id = old.user_id
+            AND {column} = {period.format("old")}
+            AND category_id = old.category_id;
+        DELETE FROM {table}
+        WHERE user_id = old.user_id
+            AND {column} = {period.format("old")}
+            AND category_id = old.category_id
+            AND count <= 0;
+    """
+    insert_trigger = f"""
+        CREATE TRIGGER IF NOT EXISTS expenses_{name}_ai AFTER INSERT ON expenses BEGIN
+            {add}
+        END
+    """
+    return {
+        "insert_trigger": f"expenses_{name}_ai",
+        "insert_trigger_ddl": insert_trigger,
+        "triggers_ddl": [
+            insert_trigger,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS expenses_{name}_ad AFTER DELETE ON expenses BEGIN
+                {subtract}
+            END
+            """,
+            f"""
+            CREATE TRIGGER IF NOT EXISTS expenses_{name}_au
+            AFTER UPDATE OF amount, category_id, created_at, user_id ON expenses BEGIN
+                {subtract}
+                {add}
+            END
+            """,
+        ],
+        "rebuild": [
+            f"DELETE FROM {table}",
+            f"""
+            INSERT INTO {table} (user_id, {column}, category_id, count, total)
+            SELECT user_id, {period.format("expenses")}, category_id, COUNT(*), SUM(amount)
+            FROM expenses
+            GROUP BY 1, 2, 3
+            """,
+        ],
+    }
+
+
+_ROLLUPS = [
+    _rollup(
+        "rollup",
+        "expense_monthly_totals",
+        "year_month",
+        "strftime('%Y-%m', {}.created_at)",
+    ),
+    _rollup("daily_rollup", "expense_daily_totals", "day", "date({}.created_at)"),
+]
+
+_state = {"enabled": False}
+
+
+def rollups_enabled() -> bool:
+    """Whether the rollup triggers are maintained on this database."""
+    return _state["enabled"]
+
+
+async def init_rollups(engine) -> bool:
+    """Creates the rollup triggers, backfilling the totals when they are new.
+
+    A missing insert trigger means the totals were never built or a bulk load
+    stopped while they were suspended, so they are rebuilt from `expenses`.
+    Only SQLite is supported; returns False for other databases.
+    """
+    if engine.dialect.name != "sqlite":
+        _state["enabled"] = False
+        return False
+
+    async with engine.begin() as conn:
+        for rollup in _ROLLUPS:
+            result = await conn.exec_driver_sql(
+                "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = ?",
+                (rollup["insert_trigger"],),
+            )
+            if result.first() is None:
+                for statement in rollup["rebuild"]:
+                    await conn.exec_driver_sql(statement)
+            for statement in rollup["triggers_ddl"]:
+                await conn.exec_driver_sql(statement)
+
+    _state["enabled"] = True
+    return True
+
+
+async def rebuild_rollups(session):
+    """Recomputes every monthly and daily total from the `expenses` table."""
+    for rollup in _ROLLUPS:
+        for statement in rollup["rebuild"]:
+            await session.execute(text(statement))
+    await session.commit()
+
+
+async def suspend_rollup_sync(session):
+    """Stops updating the totals on insert, ahead of a bulk load."""
+    if rollups_enabled():
+        for rollup in _ROLLUPS:
+            await session.execute(
+                text(f"DROP TRIGGER IF EXISTS {rollup['insert_trigger']}")
+            )
+        await session.commit()
+
+
+async def resume_rollup_sync(session):
+    """Restores the insert triggers and rebuilds the totals once."""
+    if rollups_enabled():
+        for rollup in _ROLLUPS:
+            await session.execute(text(rollup["insert_trigger_ddl"]))
+        await rebuild_rollups(session)
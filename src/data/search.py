@@ -0,0 +1,122 @@
+import logging
+import re
+
+from sqlalchemy import column, table, text
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger(__name__)
+
+# External-content FTS5 index over `expenses.description`. The triggers keep
+# it in sync with the `expenses` table on insert, update and delete.
+expenses_fts = table("expenses_fts", column("rowid"), column("rank"))
+
+_FTS_TABLE_DDL = """
+    CREATE VIRTUAL TABLE expenses_fts USING fts5(
+        description,
+        content='expenses',
+        content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+"""
+
+_FTS_INSERT_TRIGGER_DDL = """
+    CREATE TRIGGER IF NOT EXISTS expenses_fts_ai AFTER INSERT ON expenses BEGIN
+        INSERT INTO expenses_fts(rowid, description)
+        VALUES (new.id, new.description);
+    END
+"""
+
+_FTS_TRIGGERS_DDL = [
+    _FTS_INSERT_TRIGGER_DDL,
+    """
+    CREATE TRIGGER IF NOT EXISTS expenses_fts_ad AFTER DELETE ON expenses BEGIN
+        INSERT INTO expenses_fts(expenses_fts, rowid, description)
+        VALUES ('delete', old.id, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS expenses_fts_au
+    AFTER UPDATE OF description ON expenses BEGIN
+        INSERT INTO expenses_fts(expenses_fts, rowid, description)
+        VALUES ('delete', old.id, old.description);
+        INSERT INTO expenses_fts(rowid, description)
+        VALUES (new.id, new.description);
+    END
+    """,
+]
+
+_FTS_REBUILD = "INSERT INTO expenses_fts(expenses_fts) VALUES ('rebuild')"
+
+_state = {"enabled": False}
+
+
+def fulltext_search_enabled() -> bool:
+    """Whether the FTS5 index is available to this process."""
+    return _state["enabled"]
+
+
+async def init_fulltext_search(engine) -> bool:
+    """Creates and backfills the FTS5 index if SQLite was built with FTS5.
+
+    Leaves full-text search disabled when the module is not compiled in, in
+    which case searches fall back to a `LIKE` scan. A missing insert trigger
+    means a bulk load stopped while it was suspended and left rows out of the
+    index, so the index is then rebuilt from `expenses`.
+    """
+    async with engine.connect() as conn:
+        result = await conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'expenses_fts'"
+        )
+        exists = result.first() is not None
+        result = await conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'trigger' "
+            "AND name = 'expenses_fts_ai'"
+        )
+        in_sync = result.first() is not None
+
+    try:
+        async with engine.begin() as conn:
+            if not exists:
+                await conn.exec_driver_sql(_FTS_TABLE_DDL)
+            for statement in _FTS_TRIGGERS_DDL:
+                await conn.exec_driver_sql(statement)
+            if not exists or not in_sync:
+                await conn.exec_driver_sql(_FTS_REBUILD)
+    except OperationalError as e:
+        logger.warning("Full-text search is disabled: %s", e.orig)
+        _state["enabled"] = False
+        return False
+
+    _state["enabled"] = True
+    return True
+
+
+async def suspend_fulltext_sync(session):
+    """Stops indexing new expenses, ahead of a bulk load.
+
+    Rebuilding the index once afterwards with `resume_fulltext_sync` is much
+    cheaper than updating it row by row through the insert trigger.
+    """
+    if fulltext_search_enabled():
+        await session.execute(text("DROP TRIGGER IF EXISTS expenses_fts_ai"))
+        await session.commit()
+
+
+async def resume_fulltext_sync(session):
+    """Restores the insert trigger and rebuilds the FTS5 index."""
+    if fulltext_search_enabled():
+        await session.execute(text(_FTS_INSERT_TRIGGER_DDL))
+        await session.execute(text(_FTS_REBUILD))
+        await session.commit()
+
+
+def build_match_query(text: str) -> str | None:
+    """Turns free text into an FTS5 query matching every term as a prefix.
+
+    Terms are quoted, so FTS5 operators in user input are matched literally.
+    Returns None if the text contains no searchable terms.
+    """
+    terms = re.findall(r"\w+", text or "")
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
@@ -1,6 +1,6 @@
 from datetime import datetime, timezone
 
-from sqlalchemy import DateTime, String, ForeignKey, Boolean
+from sqlalchemy import DateTime, String, ForeignKey, Boolean, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.sql import func
 from typing import List, TYPE_CHECKING
@@ -24,6 +24,11 @@ class AccessToken(Base):
     """
 
     __tablename__ = "access_tokens"
+    __table_args__ = (
+        Index("ix_access_tokens_user_id", "user_id"),
+        # Lets the token reaper find expired tokens without a table scan.
+        Index("ix_access_tokens_created_at", "created_at"),
+    )
 
     id: Mapped[str] = mapped_column(String, primary_key=True, index=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
@@ -34,6 +39,33 @@ class AccessToken(Base):
     user: Mapped["User"] = relationship("User", back_populates="tokens", lazy="joined")
 
 
+class TokenRevocation(Base):
+    """Database model for the log of revoked access tokens.
+
+    Rows are only ever appended, so each process can mirror the revoked
+    tokens in memory and poll for rows past the highest `id` it has seen.
+
+    Attributes:
+        id (int): Increasing position of the revocation in the log.
+        jti (str): ID of the revoked token.
+        expires_at (datetime): When the token would have expired; the row
+            can be deleted after that.
+    """
+
+    __tablename__ = "token_revocations"
+    __table_args__ = (
+        Index("ix_token_revocations_expires_at", "expires_at"),
+        # Never reuse the ids of deleted rows, which pollers have already seen.
+        {"sqlite_autoincrement": True},
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    jti: Mapped[str] = mapped_column(String, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+
+
 class User(Base):
     """Database model for users.
 
@@ -44,6 +76,7 @@ class User(Base):
         password (str): Hashed password of the user.
         created_at (datetime): Timestamp when the user was created.
         updated_at (datetime): Timestamp when the user was last updated.
+        data_version (int): Bumped whenever the user's expenses or categories change.
         expenses (List[Expense]): List of expenses associated with the user.
         categories (List[ExpenseCategory]): List of expense categories created by the user.
     """
@@ -62,6 +95,9 @@ class User(Base):
         server_default=func.now(),
         onupdate=func.now(),
     )
+    data_version: Mapped[int] = mapped_column(
+        default=0, server_default="0", nullable=False
+    )
 
     expenses: Mapped[List["Expense"]] = relationship(
         back_populates="user", cascade="all, delete"
@@ -0,0 +1,83 @@
+from sqlalchemy import text
+
+# `users.data_version` changes whenever a user's expenses or categories do.
+# The triggers below bump it in the same transaction as every insert, update
+# and delete on those tables, so it can be compared instead of the data.
+_BUMP = "UPDATE users SET data_version = data_version + 1 WHERE id IN ({});"
+
+
+def _version_triggers_ddl(table: str) -> list:
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_version_ai AFTER INSERT ON {table} BEGIN
+            {_BUMP.format("new.user_id")}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_version_ad AFTER DELETE ON {table} BEGIN
+            {_BUMP.format("old.user_id")}
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {table}_version_au AFTER UPDATE ON {table} BEGIN
+            {_BUMP.format("new.user_id, old.user_id")}
+        END
+        """,
+    ]
+
+
+_VERSION_INSERT_TRIGGER_DDL = _version_triggers_ddl("expenses")[0]
+
+_VERSION_TRIGGERS_DDL = _version_triggers_ddl("expenses") + _version_triggers_ddl(
+    "expense_categories"
+)
+
+_state = {"enabled": False}
+
+
+def data_versions_enabled() -> bool:
+    """Whether `users.data_version` is kept up to date on this database."""
+    return _state["enabled"]
+
+
+async def init_data_versions(engine) -> bool:
+    """Creates the triggers that maintain `users.data_version`.
+
+    A missing insert trigger means a bulk load stopped while it was
+    suspended, so every user's version is bumped once for the rows it added.
+    Only SQLite is supported; returns False for other databases, where the
+    version never changes and must not be used for conditional requests.
+    """
+    if engine.dialect.name != "sqlite":
+        _state["enabled"] = False
+        return False
+
+    async with engine.begin() as conn:
+        result = await conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'trigger' "
+            "AND name = 'expenses_version_ai'"
+        )
+        if result.first() is None:
+            await conn.exec_driver_sql(
+                "UPDATE users SET data_version = data_version + 1"
+            )
+        for statement in _VERSION_TRIGGERS_DDL:
+            await conn.exec_driver_sql(statement)
+
+    _state["enabled"] = True
+    return True
+
+
+async def suspend_version_sync(session):
+    """Stops bumping versions on every expense insert, ahead of a bulk load."""
+    if data_versions_enabled():
+        await session.execute(text("DROP TRIGGER IF EXISTS expenses_version_ai"))
+        await session.commit()
+
+
+async def resume_version_sync(session):
+    """Restores the insert trigger and bumps every user's version once."""
+    if data_versions_enabled():
+        await session.execute(text(_VERSION_INSERT_TRIGGER_DDL))
+        await session.execute(text("UPDATE users SET data_version = data_version + 1"))
+        await session.commit()
@@ -1,6 +1,8 @@
-from .user import UserCreate, UserLogin, UserDisplay
+from .user import UserCreate, UserLogin, UserDisplay, CurrentUser
 from .expense import (
     ExpenseCreate,
+    BulkExpenseError,
+    BulkExpenseResult,
     ExpenseUpdate,
     ExpenseDisplay,
     ExpenseInDB,
@@ -8,8 +10,20 @@ from .expense import (
     ExpenseCategoryInDB,
     ExpenseCategoryDisplay,
     ExpenseListResponse,
+    Pagination,
+    CursorPagination,
     FilteredExpenses,
     FilteredExpenseCategory,
+    FilterSummary,
+    ExpenseBucket,
+    MonthlyTotal,
+    CategoryTotal,
+    ExpenseStats,
+    AnalyticsSeries,
+    ExpenseAnalytics,
+    ExpenseQuery,
+    KeysetPagination,
+    ExpenseQueryResult,
 )
 
 
@@ -23,7 +37,10 @@ __all__ = [
     "UserCreate",
     "UserLogin",
     "UserDisplay",
+    "CurrentUser",
     "ExpenseCreate",
+    "BulkExpenseError",
+    "BulkExpenseResult",
     "ExpenseUpdate",
     "ExpenseDisplay",
     "ExpenseInDB",
@@ -31,6 +48,18 @@ __all__ = [
     "ExpenseCategoryInDB",
     "ExpenseCategoryDisplay",
     "ExpenseListResponse",
+    "Pagination",
+    "CursorPagination",
     "FilteredExpenses",
     "FilteredExpenseCategory",
+    "FilterSummary",
+    "ExpenseBucket",
+    "MonthlyTotal",
+    "CategoryTotal",
+    "ExpenseStats",
+    "AnalyticsSeries",
+    "ExpenseAnalytics",
+    "ExpenseQuery",
+    "KeysetPagination",
+    "ExpenseQueryResult",
 ]
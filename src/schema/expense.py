@@ -1,9 +1,9 @@
 from __future__ import annotations
 
-from datetime import datetime
+from datetime import date, datetime, timezone
 
-from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional, List, Union
+from pydantic import BaseModel, Field, ConfigDict, field_validator, model_validator
+from typing import Literal, Optional, List, Union
 
 
 class ExpenseCategoryCreate(BaseModel):
@@ -35,11 +35,32 @@ class ExpenseCreate(BaseModel):
     category: Optional[str] = Field(None)
 
 
+class BulkExpenseError(BaseModel):
+    line: int
+    detail: str
+
+
+class BulkExpenseResult(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[BulkExpenseError]
+
+
 class ExpenseUpdate(BaseModel):
+    """Fields to change; omitted fields are left alone. A null `category`
+    moves the expense to the default category."""
+
     description: Optional[str] = Field(None, max_length=200)
     amount: Optional[float] = Field(None)
     category: Optional[str] = Field(None)
 
+    @field_validator("description", "amount")
+    @classmethod
+    def check_not_null(cls, value):
+        if value is None:
+            raise ValueError("must not be null")
+        return value
+
 
 class ExpenseInDB(BaseModel):
     id: int
@@ -70,14 +91,58 @@ class FilterSummary(BaseModel):
     total_amount: float
 
 
+class ExpenseBucket(BaseModel):
+    period_start: date
+    total_count: int
+    total_amount: float
+
+
+class MonthlyTotal(BaseModel):
+    month: str
+    total_count: int
+    total_amount: float
+
+
+class CategoryTotal(BaseModel):
+    category: "ExpenseCategoryDisplay"
+    total_count: int
+    total_amount: float
+
+
+class ExpenseStats(BaseModel):
+    summary: FilterSummary
+    months: List[MonthlyTotal]
+    categories: List[CategoryTotal]
+
+
+class AnalyticsSeries(BaseModel):
+    category: Optional["ExpenseCategoryDisplay"]
+    total_count: List[int]
+    total_amount: List[float]
+    cumulative_amount: List[float]
+    moving_average: List[Optional[float]]
+    change: List[Optional[float]]
+
+
+class ExpenseAnalytics(BaseModel):
+    bucket: Literal["day", "week", "month"]
+    window: int
+    summary: FilterSummary
+    periods: List[date]
+    series: List[AnalyticsSeries]
+
+
 class FilteredExpenses(BaseModel):
     summary: FilterSummary
-    result: Union[ExpenseDisplay, List[ExpenseDisplay]]
+    result: Optional[Union[ExpenseDisplay, List[ExpenseDisplay]]] = None
+    breakdown: Optional[List[ExpenseBucket]] = None
 
 
 class FilteredExpenseCategory(BaseModel):
     summary: FilterSummary
-    result: "ExpenseCategoryInDB"
+    category: "ExpenseCategoryDisplay"
+    expenses: List[ExpenseDisplay]
+    pagination: "CursorPagination"
 
 
 class Pagination(BaseModel):
@@ -90,6 +155,63 @@ class Pagination(BaseModel):
     has_next: bool
 
 
+class CursorPagination(BaseModel):
+    total: Optional[int] = None
+    limit: int
+    next_cursor: Optional[str]
+    prev_cursor: Optional[str]
+    has_previous: bool
+    has_next: bool
+
+
 class ExpenseListResponse(BaseModel):
     expenses: List[ExpenseDisplay]
-    pagination: Pagination
+    pagination: Union[Pagination, CursorPagination]
+
+
+def _assume_utc(value: datetime) -> datetime:
+    """Treats a naive datetime as UTC, so it compares with aware ones."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+class ExpenseQuery(BaseModel):
+    """Filters and sort order of `GET /expense/query`.
+
+    `start` is inclusive and `end` exclusive; amount bounds are inclusive.
+    """
+
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    category_ids: List[int] = Field([], max_length=50)
+    min_amount: Optional[float] = None
+    max_amount: Optional[float] = None
+    sort: Literal["-created_at", "created_at", "-amount", "amount"] = "-created_at"
+    summary: bool = False
+
+    @model_validator(mode="after")
+    def check_ranges(self):
+        if self.start and self.end and _assume_utc(self.start) >= _assume_utc(self.end):
+            raise ValueError("`from` must be before `to`")
+        if (
+            self.min_amount is not None
+            and self.max_amount is not None
+            and self.min_amount > self.max_amount
+        ):
+            raise ValueError("`min_amount` must not be greater than `max_amount`")
+        return self
+
+
+class KeysetPagination(BaseModel):
+    limit: int
+    next_cursor: Optional[str]
+    prev_cursor: Optional[str]
+    has_previous: bool
+    has_next: bool
+
+
+class ExpenseQueryResult(BaseModel):
+    summary: Optional[FilterSummary]
+    expenses: List[ExpenseDisplay]
+    pagination: KeysetPagination
@@ -24,6 +24,13 @@ class UserLogin(UserBase):
     pass
 
 
+class CurrentUser(BaseModel):
+    """The user an access token was issued to, as named by its claims."""
+
+    id: int
+    username: str
+
+
 class UserDisplay(BaseModel):
     id: int
     username: str
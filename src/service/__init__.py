@@ -1,4 +1,20 @@
 from .user import UserService
 from .expense import ExpenseService
+from .token_reaper import reap_access_tokens, run_token_reaper
+from .revocation import (
+    RevocationDenylist,
+    revocation_denylist,
+    sync_revocations,
+    run_revocation_sync,
+)
 
-__all__ = ["UserService", "ExpenseService"]
+__all__ = [
+    "UserService",
+    "ExpenseService",
+    "reap_access_tokens",
+    "run_token_reaper",
+    "RevocationDenylist",
+    "revocation_denylist",
+    "sync_revocations",
+    "run_revocation_sync",
+]
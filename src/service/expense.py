@@ -1,83 +1,461 @@
-from datetime import datetime, timedelta, timezone
+from datetime import date, datetime, timedelta, timezone
 
-from sqlalchemy import and_, func
+import numpy as np
+
+from sqlalchemy import (
+    String,
+    and_,
+    delete,
+    func,
+    insert,
+    literal,
+    literal_column,
+    tuple_,
+    type_coerce,
+    update,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm import aliased
 from sqlalchemy.future import select
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from src.data import (
+    Expense,
+    ExpenseCategory,
+    ExpenseMonthlyTotal,
+    ExpenseDailyTotal,
+    normalize_category_name,
+    expenses_fts,
+    fulltext_search_enabled,
+    build_match_query,
+    rollups_enabled,
+    category_upsert_enabled,
+)
+from typing import Iterable, List
 
-from src.data import User, Expense, ExpenseCategory
 from src.schema import (
+    ExpenseCategoryDisplay,
     ExpenseCreate,
+    ExpenseQuery,
     ExpenseUpdate,
 )
 from src.utils import (
-    Unauthorized,
+    BadRequest,
     InternalServerError,
     NotFound,
+    Conflict,
+    encode_cursor,
+    decode_cursor,
+    principal_cache,
+    category_cache,
+    settings,
+)
+from src.utils.seed import DEFAULT_CATEGORY
+from src.utils.series import (
+    bucket_count,
+    bucket_periods,
+    bucket_positions,
+    bucket_start,
+    derive_series,
 )
 
 
+# `created_at` is compared as the raw stored text so that cursor positions
+# round-trip exactly; SQLite keeps server-default and ORM-written timestamps
+# in slightly different textual formats.
+_created_at_key = type_coerce(Expense.created_at, String)
+
+
+def _as_utc(value: datetime | None) -> datetime | None:
+    """Converts an aware datetime to UTC; naive values are assumed to be UTC.
+
+    Timestamps are stored without an offset, so bounds have to be in UTC
+    before they are compared against them.
+    """
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc)
+
+
+def _timestamp_key(value: datetime) -> str:
+    """Formats a UTC bound to compare against `_created_at_key`.
+
+    Microseconds are only written when set. The bound then orders correctly
+    against both stored formats, with and without a `.000000` suffix.
+    """
+    key = value.strftime("%Y-%m-%d %H:%M:%S")
+    return f"{key}.{value.microsecond:06d}" if value.microsecond else key
+
+
+# SQL expressions mapping a timestamp to the first day of its bucket.
+_BUCKET_EXPRESSIONS = {
+    "day": lambda column: func.date(column),
+    "week": lambda column: func.date(column, "weekday 0", "-6 days"),
+    "month": lambda column: func.strftime("%Y-%m-01", column),
+}
+
+# Most buckets `get_expense_analytics` returns per series, about ten years
+# of days.
+MAX_ANALYTICS_BUCKETS = 3660
+
+
+# Expense columns returned by the mutators in place of a reload.
+_EXPENSE_RETURNING = (
+    Expense.id,
+    Expense.description,
+    Expense.amount,
+    Expense.created_at,
+    Expense.updated_at,
+)
+
+# Columns behind each `ExpenseDisplay` field, read as plain rows instead of
+# ORM objects. `id` is always selected, since cursors are built from it.
+_EXPENSE_FIELD_COLUMNS = {
+    "id": (),
+    "description": (Expense.description,),
+    "amount": (Expense.amount,),
+    "category": (
+        ExpenseCategory.id.label("category_id"),
+        ExpenseCategory.name.label("category_name"),
+    ),
+    "created_at": (Expense.created_at,),
+    "updated_at": (Expense.updated_at,),
+}
+
+
+def _select_expense_rows(fields: tuple | None = None):
+    """Selects the columns of the given expense fields, or of all of them.
+
+    Categories are joined only when the `category` field is requested. The
+    join is an outer join, which keeps `expenses` driving the query plan.
+    """
+    columns = [Expense.id]
+    for field in fields or _EXPENSE_FIELD_COLUMNS:
+        columns.extend(_EXPENSE_FIELD_COLUMNS[field])
+    query = select(*columns)
+    if fields is None or "category" in fields:
+        query = query.outerjoin(
+            ExpenseCategory, Expense.category_id == ExpenseCategory.id
+        )
+    return query
+
+
+def _expense_from_row(row) -> dict:
+    """Shapes a row with every expense field like `ExpenseDisplay`."""
+    return {
+        "id": row.id,
+        "description": row.description,
+        "amount": row.amount,
+        "category": {"id": row.category_id, "name": row.category_name},
+        "created_at": row.created_at,
+        "updated_at": row.updated_at,
+    }
+
+
+def _expense_shaper(fields: tuple | None = None):
+    """Returns a function shaping rows from `_select_expense_rows(fields)`."""
+    if fields is None:
+        return _expense_from_row
+
+    def shape(row) -> dict:
+        expense = {}
+        for field in fields:
+            if field == "category":
+                expense[field] = {"id": row.category_id, "name": row.category_name}
+            else:
+                expense[field] = getattr(row, field)
+        return expense
+
+    return shape
+
+
+_category = aliased(ExpenseCategory)
+_category_name = (
+    select(_category.name)
+    .where(_category.id == Expense.category_id)
+    .correlate(Expense)
+    .scalar_subquery()
+)
+
+
+# Columns expenses can be sorted and paginated by; `-` sorts descending.
+_SORT_KEYS = {
+    "created_at": _created_at_key,
+    "amount": Expense.amount,
+}
+
+
+async def _paginate_by_cursor(
+    session: AsyncSession,
+    query,
+    total: int | None,
+    limit: int,
+    cursor=None,
+    shape=_expense_from_row,
+    sort: str = "-created_at",
+):
+    """Applies keyset pagination on `(sort key, id)` to an expense row query.
+
+    Expenses are returned newest first by default. The cost of a page does
+    not depend on how deep it is, since each page seeks directly to its
+    cursor position. `total` is left out of the pagination when None.
+    """
+    descending = sort.startswith("-")
+    sort_key = _SORT_KEYS[sort.lstrip("-")]
+    direction = "next"
+    if cursor:
+        position = decode_cursor(cursor)
+        if position["sort"] != sort:
+            raise BadRequest("The cursor was created for a different sort order.")
+        direction = position["direction"]
+        key = tuple_(sort_key, Expense.id)
+        bound = tuple_(literal(position["position"]), literal(position["id"]))
+        before = (direction == "next") == descending
+        query = query.where(key < bound if before else key > bound)
+
+    if (direction == "next") == descending:
+        order = (sort_key.desc(), Expense.id.desc())
+    else:
+        order = (sort_key.asc(), Expense.id.asc())
+
+    query = (
+        query.add_columns(sort_key.label("position")).order_by(*order).limit(limit + 1)
+    )
+    result = await session.execute(query)
+    rows = result.all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if direction == "prev":
+        rows.reverse()
+
+    has_next = has_more if direction == "next" else True
+    has_previous = bool(cursor) and (direction == "next" or has_more)
+
+    next_cursor = prev_cursor = None
+    if rows and has_next:
+        next_cursor = encode_cursor(rows[-1].position, rows[-1].id, "next", sort)
+    if rows and has_previous:
+        prev_cursor = encode_cursor(rows[0].position, rows[0].id, "prev", sort)
+
+    pagination = {} if total is None else {"total": total}
+    pagination |= {
+        "limit": limit,
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+        "has_previous": has_previous,
+        "has_next": has_next,
+    }
+
+    return [shape(row) for row in rows], pagination
+
+
+def _is_foreign_key_error(error: IntegrityError) -> bool:
+    return "FOREIGN KEY constraint failed" in str(error.orig)
+
+
+async def _with_fresh_categories(
+    session: AsyncSession, user_id: int, names: Iterable[str], write
+):
+    """Runs `write`, retrying it once if a cached category id was stale.
+
+    The category cache can outlive a category that another process deleted,
+    and the foreign key then rejects the write. When one of `names` was
+    served from the cache, the user's cache entry is dropped and the write
+    runs again, resolving its categories from the database. Other integrity
+    errors are raised as they are.
+    """
+    cached = category_cache.get(user_id) or {}
+    used_cache = any(normalize_category_name(name) in cached for name in names)
+    try:
+        return await write()
+    except IntegrityError as e:
+        if not used_cache or not _is_foreign_key_error(e):
+            raise
+        await session.rollback()
+        category_cache.pop(user_id)
+        return await write()
+
+
 class ExpenseService:
     @staticmethod
     async def add_expense(session: AsyncSession, expense: ExpenseCreate, user_id: int):
+        """Inserts an expense with `INSERT ... RETURNING`.
+
+        Takes one statement when the category is cached, two when it exists
+        and three when it is created, in a single transaction.
+        """
         try:
-            user = await session.get(User, user_id)
-            if not user:
-                raise Unauthorized("Invalid User Credentials.")
+            category_name = expense.category or DEFAULT_CATEGORY
 
-            category = await ExpenseService.create_category_if_none(
-                session, expense.category, user_id
-            )
+            async def write():
+                category = await ExpenseService.resolve_category(
+                    session, user_id, category_name
+                )
+                result = await session.execute(
+                    insert(Expense)
+                    .values(
+                        description=expense.description,
+                        amount=expense.amount,
+                        user_id=user_id,
+                        category_id=category.id,
+                    )
+                    .returning(*_EXPENSE_RETURNING)
+                )
+                return category, result.one()
 
-            new_expense = Expense(
-                description=expense.description,
-                amount=expense.amount,
-                user_id=user_id,
-                category_id=category.id,
+            category, row = await _with_fresh_categories(
+                session, user_id, [category_name], write
             )
-
-            session.add(new_expense)
             await session.commit()
-            await session.refresh(new_expense)
-            expense_with_relations = await session.get(
-                Expense, new_expense.id, options=[selectinload(Expense.category)]
-            )
+            ExpenseService.remember_category(user_id, category)
+
+            return {**row._asdict(), "category": category}
+        except SQLAlchemyError as e:
+            await session.rollback()
+            raise InternalServerError(f"{e}")
+
+    @staticmethod
+    async def bulk_add_expenses(
+        session: AsyncSession, expenses: List[ExpenseCreate], user_id: int
+    ) -> int:
+        """Inserts many expenses in a single transaction.
+
+        Category names are resolved with one lookup, and rows are written in
+        `executemany` batches of `BULK_INSERT_CHUNK_SIZE`.
+        """
+        try:
+            category_names = {
+                expense.category or DEFAULT_CATEGORY for expense in expenses
+            }
 
-            return expense_with_relations
+            async def write():
+                category_ids = await ExpenseService.resolve_category_ids(
+                    session, user_id, category_names
+                )
+
+                chunk_size = settings.BULK_INSERT_CHUNK_SIZE
+                for start in range(0, len(expenses), chunk_size):
+                    rows = [
+                        {
+                            "description": expense.description,
+                            "amount": expense.amount,
+                            "user_id": user_id,
+                            "category_id": category_ids[
+                                expense.category or DEFAULT_CATEGORY
+                            ],
+                        }
+                        for expense in expenses[start : start + chunk_size]
+                    ]
+                    await session.execute(insert(Expense), rows)
+
+            await _with_fresh_categories(session, user_id, category_names, write)
+            await session.commit()
+            principal_cache.invalidate_group(user_id)
+            return len(expenses)
         except SQLAlchemyError as e:
             await session.rollback()
             raise InternalServerError(f"{e}")
 
+    @staticmethod
+    async def resolve_category_ids(
+        session: AsyncSession, user_id: int, names: Iterable[str]
+    ) -> dict:
+        """Maps category names to ids, creating the ones that don't exist.
+
+        Existing categories are fetched with a single query and missing ones
+        are inserted together. The caller is responsible for committing.
+        """
+        requested = {}
+        names = set(names)
+        for name in names:
+            requested.setdefault(normalize_category_name(name), name)
+        if not requested:
+            return {}
+
+        cached = category_cache.get(user_id)
+        if cached is not None and all(key in cached for key in requested):
+            return {name: cached[normalize_category_name(name)].id for name in names}
+
+        query = select(ExpenseCategory.id, ExpenseCategory.name).where(
+            and_(
+                ExpenseCategory.user_id == user_id,
+                func.lower(ExpenseCategory.name).in_(list(requested)),
+            )
+        )
+        result = await session.execute(query)
+        category_ids = {normalize_category_name(name): id for id, name in result.all()}
+
+        missing = [
+            {"name": name, "user_id": user_id}
+            for key, name in requested.items()
+            if key not in category_ids
+        ]
+        if missing:
+            result = await session.execute(
+                insert(ExpenseCategory).returning(
+                    ExpenseCategory.id, ExpenseCategory.name
+                ),
+                missing,
+            )
+            category_ids.update(
+                {normalize_category_name(name): id for id, name in result.all()}
+            )
+            # The new categories are not committed yet.
+            category_cache.pop(user_id)
+
+        return {name: category_ids[normalize_category_name(name)] for name in names}
+
     @staticmethod
     async def update_expense(
         session: AsyncSession, update_form: ExpenseUpdate, user_id: int, expense_id: int
     ):
-        try:
-            query = (
-                select(Expense)
-                .where(and_(Expense.id == expense_id, Expense.user_id == user_id))
-                .options(selectinload(Expense.category))
-            )
-            result = await session.execute(query)
-            expense = result.scalar_one_or_none()
-            if not expense:
-                raise NotFound(f"Expense {expense_id} was not found.")
+        """Updates an expense with `UPDATE ... RETURNING`.
 
+        Takes one statement, plus one when the category changes to one that
+        is not cached and another when it is created, in a single
+        transaction.
+        """
+        try:
             update_data = update_form.model_dump(exclude_unset=True)
-            if "category" in update_data:
-                category = await ExpenseService.create_category_if_none(
-                    session, update_data["category"], user_id
-                )
-                update_data["category_id"] = category.id
-                del update_data["category"]
+            changes_category = "category" in update_data
+            category_name = update_data.pop("category", None) or DEFAULT_CATEGORY
+
+            async def write():
+                category = None
+                if changes_category:
+                    category = await ExpenseService.resolve_category(
+                        session, user_id, category_name
+                    )
+                    update_data["category_id"] = category.id
 
-            for key, value in update_data.items():
-                setattr(expense, key, value)
+                result = await session.execute(
+                    update(Expense)
+                    .where(and_(Expense.id == expense_id, Expense.user_id == user_id))
+                    .values(**update_data)
+                    .returning(
+                        *_EXPENSE_RETURNING,
+                        Expense.category_id,
+                        _category_name.label("category_name"),
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                return category, result.one_or_none()
 
+            category, row = await _with_fresh_categories(
+                session, user_id, [category_name] if changes_category else [], write
+            )
+            if row is None:
+                await session.rollback()
+                raise NotFound(f"Expense {expense_id} was not found.")
             await session.commit()
-            await session.refresh(expense)
+            if category is not None:
+                ExpenseService.remember_category(user_id, category)
 
+            *values, category_id, category_name = row
+            expense = dict(zip(row._fields, values))
+            expense["category"] = {"id": category_id, "name": category_name}
             return expense
 
         except SQLAlchemyError as e:
@@ -86,13 +464,17 @@ class ExpenseService:
 
     @staticmethod
     async def delete_expense(session: AsyncSession, user_id: int, expense_id: int):
+        """Deletes an expense owned by the user in a single statement."""
         try:
-            expense = await session.get(Expense, expense_id)
-
-            if not expense or expense.user_id != user_id:
+            result = await session.execute(
+                delete(Expense)
+                .where(and_(Expense.id == expense_id, Expense.user_id == user_id))
+                .returning(Expense.id)
+                .execution_options(synchronize_session=False)
+            )
+            if result.scalar_one_or_none() is None:
+                await session.rollback()
                 raise NotFound(f"Expense {expense_id} not found or unauthorized.")
-
-            await session.delete(expense)
             await session.commit()
         except SQLAlchemyError as e:
             await session.rollback()
@@ -100,43 +482,70 @@ class ExpenseService:
 
     @staticmethod
     async def search_expenses_by_description(
-        session: AsyncSession, user_id: int, description: str
+        session: AsyncSession,
+        user_id: int,
+        description: str,
+        limit: int = 20,
+        skip: int = 0,
+        fields: tuple | None = None,
     ):
         try:
-            query = (
-                select(Expense)
-                .filter(Expense.description.ilike(f"%{description}%"))
-                .options(joinedload(Expense.category))
-                .where(Expense.user_id == user_id)
-            )
-            result = await session.execute(query)
-            expenses = result.scalars().all()
+            if fulltext_search_enabled():
+                match_query = build_match_query(description)
+                if not match_query:
+                    return []
+
+                query = (
+                    _select_expense_rows(fields)
+                    .join(expenses_fts, expenses_fts.c.rowid == Expense.id)
+                    .where(
+                        and_(
+                            literal_column("expenses_fts").match(match_query),
+                            Expense.user_id == user_id,
+                        )
+                    )
+                    .order_by(expenses_fts.c.rank, Expense.id.desc())
+                )
+            else:
+                query = (
+                    _select_expense_rows(fields)
+                    .filter(Expense.description.ilike(f"%{description}%"))
+                    .where(Expense.user_id == user_id)
+                    .order_by(Expense.id.desc())
+                )
+
+            result = await session.execute(query.offset(skip).limit(limit))
+            shape = _expense_shaper(fields)
 
-            return expenses
+            return [shape(row) for row in result.all()]
         except SQLAlchemyError as e:
             await session.rollback()
             raise InternalServerError(f"Database error: {str(e)}") from e
 
     @staticmethod
     async def get_all_expenses(
-        session: AsyncSession, user_id: int, limit: int = 10, skip: int = 0
+        session: AsyncSession,
+        user_id: int,
+        limit: int = 10,
+        skip: int = 0,
+        fields: tuple | None = None,
     ):
         try:
-
-            total = await session.scalar(func.count(Expense.id))
+            total = await ExpenseService.count_user_expenses(session, user_id)
 
             total_pages = (total // limit) + (1 if total % limit != 0 else 0)
             current_page = (skip // limit) + 1
 
             query = (
-                select(Expense)
+                _select_expense_rows(fields)
                 .where(Expense.user_id == user_id)
-                .options(joinedload(Expense.category))
+                .order_by(_created_at_key.desc(), Expense.id.desc())
                 .offset(skip)
                 .limit(limit)
             )
             result = await session.execute(query)
-            expenses = result.scalars().all()
+            shape = _expense_shaper(fields)
+            expenses = [shape(row) for row in result.all()]
 
             pagination = {
                 "total": total,
@@ -153,39 +562,200 @@ class ExpenseService:
         except SQLAlchemyError as e:
             raise InternalServerError(f"{e}")
 
+    @staticmethod
+    async def get_expenses_by_cursor(
+        session: AsyncSession,
+        user_id: int,
+        limit: int = 10,
+        cursor: str = None,
+        fields: tuple | None = None,
+        include_total: bool = False,
+    ):
+        """Returns one keyset page of the user's expenses, newest first.
+
+        Takes a single statement, and one more for `total` when
+        `include_total` is set.
+        """
+        try:
+            total = None
+            if include_total:
+                total = await ExpenseService.count_user_expenses(session, user_id)
+
+            query = _select_expense_rows(fields).where(Expense.user_id == user_id)
+            expenses, pagination = await _paginate_by_cursor(
+                session, query, total, limit, cursor, _expense_shaper(fields)
+            )
+
+            # `CursorPagination` always has `total`, null unless requested.
+            pagination = {"total": total, **pagination}
+            return {"expenses": expenses, "pagination": pagination}
+
+        except SQLAlchemyError as e:
+            raise InternalServerError(f"{e}")
+
+    @staticmethod
+    async def query_expenses(
+        session: AsyncSession,
+        user_id: int,
+        filters: ExpenseQuery,
+        limit: int = 10,
+        cursor: str = None,
+        fields: tuple | None = None,
+    ):
+        """Filters, sorts and pages a user's expenses in a single statement.
+
+        The filters combine with AND, and the page is read by keyset on the
+        sort key. With `filters.summary`, the count and sum of every matching
+        expense are computed in SQL by a second statement.
+        """
+        try:
+            conditions = [Expense.user_id == user_id]
+            start, end = _as_utc(filters.start), _as_utc(filters.end)
+            if start:
+                conditions.append(_created_at_key >= _timestamp_key(start))
+            if end:
+                conditions.append(_created_at_key < _timestamp_key(end))
+            if filters.category_ids:
+                conditions.append(Expense.category_id.in_(filters.category_ids))
+            if filters.min_amount is not None:
+                conditions.append(Expense.amount >= filters.min_amount)
+            if filters.max_amount is not None:
+                conditions.append(Expense.amount <= filters.max_amount)
+            conditions = and_(*conditions)
+
+            summary = None
+            if filters.summary:
+                summary_query = select(
+                    func.count(Expense.id).label("total_count"),
+                    func.coalesce(func.sum(Expense.amount), 0.0).label("total_amount"),
+                ).where(conditions)
+                summary_result = await session.execute(summary_query)
+                summary = summary_result.one()._asdict()
+
+            query = _select_expense_rows(fields).where(conditions)
+            expenses, pagination = await _paginate_by_cursor(
+                session,
+                query,
+                None,
+                limit,
+                cursor,
+                _expense_shaper(fields),
+                filters.sort,
+            )
+
+            return {"summary": summary, "expenses": expenses, "pagination": pagination}
+
+        except SQLAlchemyError as e:
+            raise InternalServerError(f"{e}")
+
+    @staticmethod
+    async def count_user_expenses(session: AsyncSession, user_id: int) -> int:
+        """Counts the user's expenses.
+
+        Sums the monthly rollup when it is maintained, which reads one row per
+        month and category instead of one per expense.
+        """
+        try:
+            if rollups_enabled():
+                query = select(
+                    func.coalesce(func.sum(ExpenseMonthlyTotal.count), 0)
+                ).where(ExpenseMonthlyTotal.user_id == user_id)
+            else:
+                query = select(func.count(Expense.id)).where(Expense.user_id == user_id)
+            return await session.scalar(query)
+        except SQLAlchemyError as e:
+            raise InternalServerError(f"{e}")
+
+    @staticmethod
+    async def stream_expenses(
+        session: AsyncSession,
+        user_id: int,
+        start: datetime = None,
+        end: datetime = None,
+    ):
+        """Yields a user's expenses, oldest first, in batches of plain rows.
+
+        Rows are read through a server-side cursor `EXPORT_BATCH_SIZE` at a
+        time, so memory use does not grow with the number of expenses.
+        """
+        start, end = _as_utc(start), _as_utc(end)
+        conditions = [Expense.user_id == user_id]
+        if start:
+            conditions.append(_created_at_key >= _timestamp_key(start))
+        if end:
+            conditions.append(_created_at_key < _timestamp_key(end))
+
+        query = (
+            select(
+                Expense.id,
+                Expense.description,
+                Expense.amount,
+                ExpenseCategory.name.label("category"),
+                Expense.created_at,
+                Expense.updated_at,
+            )
+            .outerjoin(ExpenseCategory, Expense.category_id == ExpenseCategory.id)
+            .where(and_(*conditions))
+            .order_by(Expense.created_at, Expense.id)
+            .execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+        )
+
+        try:
+            result = await session.stream(query)
+            async for batch in result.partitions():
+                yield batch
+        except SQLAlchemyError as e:
+            raise InternalServerError(f"{e}")
+
     @staticmethod
     async def filter_expenses_by_category(
         session: AsyncSession,
         user_id: int,
         category: str,
+        limit: int = 10,
+        cursor: str = None,
+        fields: tuple | None = None,
     ):
         try:
-            query = (
-                select(ExpenseCategory)
-                .where(
-                    and_(
-                        ExpenseCategory.user_id == user_id,
-                        ExpenseCategory.name.ilike(f"%{category}%"),
-                    )
+            query = select(ExpenseCategory.id, ExpenseCategory.name).where(
+                and_(
+                    ExpenseCategory.user_id == user_id,
+                    func.lower(ExpenseCategory.name) == func.lower(category),
                 )
-                .options(selectinload(ExpenseCategory.expenses))
             )
             result = await session.execute(query)
-            filtered_result = result.unique().scalar_one_or_none()
-            if not filtered_result:
+            filtered_category = result.one_or_none()
+            if not filtered_category:
                 raise NotFound(f"Category {category} was not found.")
+            filtered_category = filtered_category._asdict()
 
-            expenses_count = len(filtered_result.expenses)
-            total_amount = sum((expense.amount for expense in filtered_result.expenses))
+            conditions = and_(
+                Expense.user_id == user_id,
+                Expense.category_id == filtered_category["id"],
+            )
 
-            summary = {
-                "total_count": expenses_count,
-                "total_amount": total_amount,
-            }
+            summary_query = select(
+                func.count(Expense.id).label("total_count"),
+                func.coalesce(func.sum(Expense.amount), 0.0).label("total_amount"),
+            ).where(conditions)
+            summary_result = await session.execute(summary_query)
+            summary = summary_result.one()._asdict()
+
+            query = _select_expense_rows(fields).where(conditions)
+            expenses, pagination = await _paginate_by_cursor(
+                session,
+                query,
+                summary["total_count"],
+                limit,
+                cursor,
+                _expense_shaper(fields),
+            )
 
             return {
-                "result": filtered_result,
                 "summary": summary,
+                "category": filtered_category,
+                "expenses": expenses,
+                "pagination": pagination,
             }
 
         except SQLAlchemyError as e:
@@ -196,55 +766,359 @@ class ExpenseService:
         session: AsyncSession,
         user_id: int,
         weeks: int = 1,
+        summary_only: bool = False,
+        bucket: str = None,
+        fields: tuple | None = None,
     ):
-
         try:
             cutoff_date = datetime.now(timezone.utc) - timedelta(weeks=weeks)
+            conditions = and_(
+                Expense.created_at >= cutoff_date,
+                Expense.user_id == user_id,
+            )
 
-            query = (
-                select(Expense)
-                .where(
-                    and_(
-                        Expense.created_at >= cutoff_date,
-                        Expense.user_id == user_id,
+            summary_query = select(
+                func.count(Expense.id).label("total_count"),
+                func.coalesce(func.sum(Expense.amount), 0.0).label("total_amount"),
+            ).where(conditions)
+            summary_result = await session.execute(summary_query)
+            summary = summary_result.one()._asdict()
+
+            # Keys follow the field order of `FilteredExpenses`.
+            response = {"summary": summary}
+
+            if not summary_only:
+                query = _select_expense_rows(fields).where(conditions)
+                result = await session.execute(query)
+                shape = _expense_shaper(fields)
+                response["result"] = [shape(row) for row in result.all()]
+
+            if bucket:
+                period = _BUCKET_EXPRESSIONS[bucket](Expense.created_at)
+                breakdown_query = (
+                    select(
+                        period.label("period_start"),
+                        func.count(Expense.id).label("total_count"),
+                        func.sum(Expense.amount).label("total_amount"),
                     )
+                    .where(conditions)
+                    .group_by(period)
+                    .order_by(period)
+                )
+                breakdown_result = await session.execute(breakdown_query)
+                response["breakdown"] = [
+                    row._asdict() for row in breakdown_result.all()
+                ]
+
+            return response
+
+        except SQLAlchemyError as e:
+            raise InternalServerError(f"Database error: {e}")
+
+    @staticmethod
+    async def get_expense_stats(
+        session: AsyncSession,
+        user_id: int,
+        start: str | None = None,
+        end: str | None = None,
+        category_id: int | None = None,
+    ):
+        """Totals a user's expenses per month and per category.
+
+        Reads the monthly rollup table, so the cost depends on the number of
+        months and categories in range rather than the number of expenses.
+        `start` and `end` are inclusive `YYYY-MM` months.
+        """
+        try:
+            conditions = [ExpenseMonthlyTotal.user_id == user_id]
+            if start:
+                conditions.append(ExpenseMonthlyTotal.year_month >= start)
+            if end:
+                conditions.append(ExpenseMonthlyTotal.year_month <= end)
+            if category_id is not None:
+                conditions.append(ExpenseMonthlyTotal.category_id == category_id)
+
+            count = func.sum(ExpenseMonthlyTotal.count).label("total_count")
+            amount = func.sum(ExpenseMonthlyTotal.total).label("total_amount")
+
+            months_result = await session.execute(
+                select(ExpenseMonthlyTotal.year_month.label("month"), count, amount)
+                .where(*conditions)
+                .group_by(ExpenseMonthlyTotal.year_month)
+                .order_by(ExpenseMonthlyTotal.year_month)
+            )
+            months = [row._asdict() for row in months_result.all()]
+
+            categories_result = await session.execute(
+                select(ExpenseCategory.id, ExpenseCategory.name, count, amount)
+                .join(
+                    ExpenseCategory,
+                    ExpenseCategory.id == ExpenseMonthlyTotal.category_id,
                 )
-                .options(joinedload(Expense.category))
+                .where(*conditions)
+                .group_by(ExpenseCategory.id, ExpenseCategory.name)
+                .order_by(amount.desc())
             )
+            categories = [
+                {
+                    "category": {"id": id, "name": name},
+                    "total_count": total_count,
+                    "total_amount": total_amount,
+                }
+                for id, name, total_count, total_amount in categories_result.all()
+            ]
+
+            return {
+                "summary": {
+                    "total_count": sum(month["total_count"] for month in months),
+                    "total_amount": sum(month["total_amount"] for month in months),
+                },
+                "months": months,
+                "categories": categories,
+            }
+        except SQLAlchemyError as e:
+            raise InternalServerError(f"Database error: {e}")
 
+    @staticmethod
+    async def get_expense_analytics(
+        session: AsyncSession,
+        user_id: int,
+        bucket: str = "day",
+        group_by: str | None = None,
+        start: date | None = None,
+        end: date | None = None,
+        window: int = 3,
+    ):
+        """Totals a user's expenses per day, week or month, with derived series.
+
+        Buckets are grouped and summed in SQL, from the daily rollup table
+        when it is maintained, so the cost depends on the number of days and
+        categories in range rather than the number of expenses. Empty buckets
+        are filled with zeros, then running totals, moving averages over
+        `window` buckets and changes from the previous bucket are computed on
+        NumPy arrays. `start` and `end` are inclusive UTC days.
+        """
+        try:
+            if rollups_enabled():
+                day = ExpenseDailyTotal.day
+                category_id = ExpenseDailyTotal.category_id
+                count = func.sum(ExpenseDailyTotal.count)
+                amount = func.sum(ExpenseDailyTotal.total)
+                conditions = [ExpenseDailyTotal.user_id == user_id]
+                if start:
+                    conditions.append(day >= start.isoformat())
+                if end:
+                    conditions.append(day <= end.isoformat())
+            else:
+                day = Expense.created_at
+                category_id = Expense.category_id
+                count = func.count(Expense.id)
+                amount = func.sum(Expense.amount)
+                conditions = [Expense.user_id == user_id]
+                if start:
+                    conditions.append(_created_at_key >= start.isoformat())
+                if end:
+                    next_day = end + timedelta(days=1)
+                    conditions.append(_created_at_key < next_day.isoformat())
+
+            period = _BUCKET_EXPRESSIONS[bucket](day)
+            if rollups_enabled() and bucket == "day":
+                # Already a day; grouping on the bare column follows the index.
+                period = day
+            period = period.label("period_start")
+            if group_by == "category":
+                totals = (
+                    select(
+                        period,
+                        category_id.label("category_id"),
+                        count.label("total_count"),
+                        amount.label("total_amount"),
+                    )
+                    .where(*conditions)
+                    .group_by(period, category_id)
+                    .subquery()
+                )
+                query = select(
+                    totals.c.period_start,
+                    totals.c.total_count,
+                    totals.c.total_amount,
+                    ExpenseCategory.id,
+                    ExpenseCategory.name,
+                ).join(ExpenseCategory, ExpenseCategory.id == totals.c.category_id)
+            else:
+                query = (
+                    select(
+                        period,
+                        count.label("total_count"),
+                        amount.label("total_amount"),
+                    )
+                    .where(*conditions)
+                    .group_by(period)
+                )
             result = await session.execute(query)
-            expenses = result.scalars().all()
+            rows = result.all()
+
+            columns = list(zip(*rows))
+            first = bucket_start(start, bucket) if start else None
+            last = bucket_start(end, bucket) if end else None
+            if rows:
+                first = first or date.fromisoformat(min(columns[0]))
+                last = last or date.fromisoformat(max(columns[0]))
+            periods_count = 0
+            if first and last:
+                periods_count = bucket_count(bucket, first, last)
+            if periods_count > MAX_ANALYTICS_BUCKETS:
+                raise BadRequest(
+                    f"The range spans {periods_count} {bucket}s; "
+                    f"at most {MAX_ANALYTICS_BUCKETS} can be returned."
+                )
+
+            if group_by == "category":
+                category_ids = np.asarray(columns[3] if rows else (), dtype=np.int64)
+                category_ids, series_index = np.unique(
+                    category_ids, return_inverse=True
+                )
+                names = dict(zip(columns[3], columns[4])) if rows else {}
+                categories = [
+                    {"id": id, "name": names[id]} for id in category_ids.tolist()
+                ]
+            else:
+                series_index = np.zeros(len(rows), dtype=np.int64)
+                categories = [None] if periods_count else []
+
+            counts = np.zeros((len(categories), periods_count), dtype=np.int64)
+            amounts = np.zeros((len(categories), periods_count))
+            if rows:
+                positions = bucket_positions(bucket, first, columns[0])
+                counts[series_index, positions] = columns[1]
+                amounts[series_index, positions] = columns[2]
 
-            expenses_count = len(expenses)
-            total_amount = sum((expense.amount for expense in expenses))
+            periods = []
+            if periods_count:
+                periods = bucket_periods(bucket, first, last).astype(str).tolist()
 
-            summary = {
-                "total_count": expenses_count,
-                "total_amount": total_amount,
+            series = [{"category": category} for category in categories]
+            values = {
+                "total_count": counts.tolist(),
+                "total_amount": amounts.tolist(),
+                **derive_series(amounts, window),
             }
+            for name, per_series in values.items():
+                for entry, value in zip(series, per_series):
+                    entry[name] = value
 
             return {
-                "summary": summary,
-                "result": expenses,
+                "bucket": bucket,
+                "window": window,
+                "summary": {
+                    "total_count": int(counts.sum()),
+                    "total_amount": float(amounts.sum()),
+                },
+                "periods": periods,
+                "series": series,
             }
-
         except SQLAlchemyError as e:
             raise InternalServerError(f"Database error: {e}")
 
+    @staticmethod
+    def cache_categories(user_id: int, categories: Iterable) -> dict:
+        """Stores a user's categories in the category cache."""
+        category_map = {
+            normalize_category_name(category.name): ExpenseCategoryDisplay(
+                id=category.id, name=category.name
+            )
+            for category in categories
+        }
+        category_cache.set(user_id, category_map)
+        return category_map
+
+    @staticmethod
+    def remember_category(user_id: int, category: ExpenseCategoryDisplay):
+        """Adds a committed category to the user's cached categories."""
+        category_map = category_cache.get(user_id)
+        if category_map is None:
+            ExpenseService.cache_categories(user_id, [category])
+        else:
+            category_map[normalize_category_name(category.name)] = category
+
+    @staticmethod
+    async def resolve_category(
+        session: AsyncSession, user_id: int, name: str
+    ) -> ExpenseCategoryDisplay:
+        """Returns the user's category with this name, creating it if needed.
+
+        Served from the category cache when possible, and otherwise looked up
+        by name. A missing category is inserted, doing nothing if another
+        request created it meanwhile, in which case it is looked up again.
+        Existing rows are never written, so the user's data version only
+        changes when a category is created. The caller commits, then passes
+        the category to `remember_category`.
+        """
+        category_map = category_cache.get(user_id)
+        if category_map is not None:
+            category = category_map.get(normalize_category_name(name))
+            if category is not None:
+                return category
+
+        row = await ExpenseService._select_category(session, user_id, name)
+        if row is None:
+            row = await ExpenseService._insert_category(session, user_id, name)
+        if row is None:
+            row = await ExpenseService._select_category(session, user_id, name)
+        return ExpenseCategoryDisplay(id=row.id, name=row.name)
+
+    @staticmethod
+    async def _select_category(session: AsyncSession, user_id: int, name: str):
+        """Returns the id and name of the user's category, ignoring case."""
+        result = await session.execute(
+            select(ExpenseCategory.id, ExpenseCategory.name)
+            .where(
+                and_(
+                    ExpenseCategory.user_id == user_id,
+                    func.lower(ExpenseCategory.name) == func.lower(name),
+                )
+            )
+            .order_by(ExpenseCategory.id)
+            .limit(1)
+        )
+        return result.first()
+
+    @staticmethod
+    async def _insert_category(session: AsyncSession, user_id: int, name: str):
+        """Inserts a category and returns its id and name.
+
+        Returns None when the unique index on the name rejected it. Without
+        that index, which the conflict clause needs, a plain insert is used.
+        """
+        if category_upsert_enabled():
+            statement = sqlite_insert(ExpenseCategory).on_conflict_do_nothing(
+                index_elements=[
+                    ExpenseCategory.user_id,
+                    func.lower(ExpenseCategory.name),
+                ]
+            )
+        else:
+            statement = insert(ExpenseCategory)
+        result = await session.execute(
+            statement.values(name=name, user_id=user_id).returning(
+                ExpenseCategory.id, ExpenseCategory.name
+            )
+        )
+        row = result.first()
+        if row is not None:
+            # The user's category list has grown.
+            principal_cache.invalidate_group(user_id)
+        return row
+
     @staticmethod
     async def create_category_if_none(session: AsyncSession, name: str, user_id: int):
         try:
-            category = await session.execute(
-                select(ExpenseCategory).filter_by(name=name, user_id=user_id)
-            )
-            category = category.scalars().first()
-            if not category:
-                category = ExpenseCategory(name=name, user_id=user_id)
-                session.add(category)
-                await session.commit()
-                await session.refresh(category)
+            category = await ExpenseService.resolve_category(session, user_id, name)
+            await session.commit()
+            ExpenseService.remember_category(user_id, category)
             return category
         except SQLAlchemyError as e:
+            await session.rollback()
             raise InternalServerError(f"{e}")
 
     @staticmethod
@@ -270,8 +1144,13 @@ class ExpenseService:
             session.add(category)
             await session.commit()
             await session.refresh(category)
+            principal_cache.invalidate_group(user_id)
+            category_cache.pop(user_id)
 
             return category
+        except IntegrityError:
+            await session.rollback()
+            raise Conflict(f"Category {name} already exists.")
         except SQLAlchemyError as e:
             raise InternalServerError(f"{e}")
 
@@ -282,20 +1161,53 @@ class ExpenseService:
         category_id: int,
     ):
         try:
-            query = select(ExpenseCategory).where(
-                and_(
-                    ExpenseCategory.id == category_id,
-                    ExpenseCategory.user_id == user_id,
+
+            async def write():
+                query = select(ExpenseCategory).where(
+                    and_(
+                        ExpenseCategory.id == category_id,
+                        ExpenseCategory.user_id == user_id,
+                    )
                 )
-            )
-            result = await session.execute(query)
+                result = await session.execute(query)
 
-            category = result.scalar_one_or_none()
-            if not category:
-                raise NotFound(f"Category {category_id} was not found.")
+                category = result.scalar_one_or_none()
+                if not category:
+                    raise NotFound(f"Category {category_id} was not found.")
 
-            await session.delete(category)
+                # Expenses of a deleted category move to the default one. The
+                # rollup triggers move their monthly totals in the same transaction.
+                if normalize_category_name(category.name) == normalize_category_name(
+                    DEFAULT_CATEGORY
+                ):
+                    in_use = await session.scalar(
+                        select(Expense.id)
+                        .where(Expense.category_id == category.id)
+                        .limit(1)
+                    )
+                    if in_use is not None:
+                        raise Conflict(
+                            f"Category {category.name} still has expenses and cannot "
+                            "be deleted."
+                        )
+                else:
+                    default_category = await ExpenseService.resolve_category(
+                        session, user_id, DEFAULT_CATEGORY
+                    )
+                    await session.execute(
+                        update(Expense)
+                        .where(Expense.category_id == category.id)
+                        .values(category_id=default_category.id)
+                    )
+
+                await session.execute(
+                    delete(ExpenseCategory).where(ExpenseCategory.id == category.id)
+                )
+
+            await _with_fresh_categories(session, user_id, [DEFAULT_CATEGORY], write)
             await session.commit()
+            principal_cache.invalidate_group(user_id)
+            category_cache.pop(user_id)
 
         except SQLAlchemyError as e:
             await session.rollback()
@@ -307,11 +1219,11 @@ class ExpenseService:
         user_id: int,
     ):
         try:
-            query = select(ExpenseCategory).where(ExpenseCategory.user_id == user_id)
+            query = select(ExpenseCategory.id, ExpenseCategory.name).where(
+                ExpenseCategory.user_id == user_id
+            )
             result = await session.execute(query)
 
-            categories = result.scalars().all()
-
-            return categories
+            return [row._asdict() for row in result.all()]
         except SQLAlchemyError as e:
             raise InternalServerError(f"{e}")
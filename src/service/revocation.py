@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+
+from src.data import AsyncSessionLocal, TokenRevocation
+from src.utils import settings
+from src.utils.metrics import revocation_sync_errors
+
+logger = logging.getLogger(__name__)
+
+
+def _timestamp(value: datetime) -> float:
+    """Converts a stored timestamp, which SQLite returns without an offset."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class RevocationDenylist:
+    """The `jti`s of revoked tokens that have not expired yet, in memory.
+
+    Mirrors the `token_revocations` log: `high_water_mark` is the highest log
+    id applied, and is None until the log has been loaded. Until then no
+    token can be known not to be revoked.
+    """
+
+    def __init__(self):
+        self._expires_at: dict = {}
+        self.high_water_mark: int | None = None
+
+    @property
+    def loaded(self) -> bool:
+        return self.high_water_mark is not None
+
+    def add(self, jti: str, expires_at: float):
+        if expires_at > time.time():
+            self._expires_at[jti] = expires_at
+
+    def is_revoked(self, jti: str) -> bool:
+        expires_at = self._expires_at.get(jti)
+        if expires_at is None:
+            return False
+        if expires_at <= time.time():
+            del self._expires_at[jti]
+            return False
+        return True
+
+    def prune(self):
+        """Forgets tokens that have expired since they were revoked."""
+        now = time.time()
+        self._expires_at = {
+            jti: expires_at
+            for jti, expires_at in self._expires_at.items()
+            if expires_at > now
+        }
+
+    def clear(self):
+        self._expires_at.clear()
+        self.high_water_mark = None
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._expires_at),
+            "high_water_mark": self.high_water_mark or 0,
+        }
+
+
+revocation_denylist = RevocationDenylist()
+
+
+async def sync_revocations(session) -> int:
+    """Applies the revocations logged past the denylist's high-water mark.
+
+    The first call loads the whole log, which the token reaper keeps down
+    to revocations of unexpired tokens; later calls are a range read on the
+    primary key that usually returns nothing. Returns the rows applied.
+    """
+    result = await session.execute(
+        select(TokenRevocation.id, TokenRevocation.jti, TokenRevocation.expires_at)
+        .where(TokenRevocation.id > (revocation_denylist.high_water_mark or 0))
+        .order_by(TokenRevocation.id)
+    )
+    rows = result.all()
+    for _, jti, expires_at in rows:
+        revocation_denylist.add(jti, _timestamp(expires_at))
+    if rows:
+        revocation_denylist.high_water_mark = rows[-1].id
+    elif not revocation_denylist.loaded:
+        revocation_denylist.high_water_mark = 0
+    return len(rows)
+
+
+async def run_revocation_sync(interval: float | None = None):
+    """Polls the revocation log every `interval` seconds until cancelled.
+
+    Picks up tokens revoked through other processes.
+    """
+    interval = interval or settings.REVOCATION_POLL_INTERVAL_SECONDS
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with AsyncSessionLocal() as session:
+                await sync_revocations(session)
+            revocation_denylist.prune()
+        except Exception:
+            revocation_sync_errors.inc()
+            logger.exception("Polling the token revocation log failed")
@@ -0,0 +1,85 @@
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, select
+
+from src.data import AccessToken, AsyncSessionLocal, TokenRevocation
+from src.utils import settings
+from src.utils.metrics import (
+    access_tokens_reaped,
+    token_reaper_errors,
+    token_reaper_pass_duration,
+)
+
+logger = logging.getLogger(__name__)
+
+# Rows that no longer matter, by the reason they are reaped: tokens that
+# can no longer authenticate, and revocations of tokens that have expired.
+_REAPABLE = {
+    "expired": (
+        AccessToken,
+        lambda now, expired_before: AccessToken.created_at < expired_before,
+    ),
+    "revoked": (
+        AccessToken,
+        lambda now, expired_before: AccessToken.is_revoked.is_(True),
+    ),
+    "revocation": (
+        TokenRevocation,
+        lambda now, expired_before: TokenRevocation.expires_at < now,
+    ),
+}
+
+
+async def reap_access_tokens(batch_size: int | None = None) -> dict:
+    """Deletes expired and revoked access tokens, and the revocations of
+    expired tokens, `batch_size` at a time.
+
+    Each batch is deleted and committed in its own short transaction, and
+    other tasks get to run between batches, so requests writing to the
+    database never wait long behind the reaper. Returns the number of
+    rows deleted for each reason.
+    """
+    batch_size = batch_size or settings.TOKEN_REAPER_BATCH_SIZE
+    now = datetime.now(timezone.utc)
+    expired_before = now - timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    reaped = {}
+    for reason, (model, condition) in _REAPABLE.items():
+        reaped[reason] = 0
+        batch = (
+            select(model.id)
+            .where(condition(now, expired_before))
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        while True:
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(
+                    delete(model).where(model.id.in_(batch)),
+                    execution_options={"synchronize_session": False},
+                )
+                await session.commit()
+            reaped[reason] += result.rowcount
+            access_tokens_reaped.inc(result.rowcount, reason=reason)
+            if result.rowcount < batch_size:
+                break
+            await asyncio.sleep(0)
+    return reaped
+
+
+async def run_token_reaper(interval: float | None = None):
+    """Reaps access tokens every `interval` seconds until cancelled."""
+    interval = interval or settings.TOKEN_REAPER_INTERVAL_SECONDS
+    while True:
+        started = time.perf_counter()
+        try:
+            reaped = await reap_access_tokens()
+            if any(reaped.values()):
+                logger.info("Reaped access tokens: %s", reaped)
+        except Exception:
+            token_reaper_errors.inc()
+            logger.exception("Token reaper pass failed")
+        token_reaper_pass_duration.observe(time.perf_counter() - started)
+        await asyncio.sleep(interval)
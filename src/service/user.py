@@ -1,5 +1,5 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import joinedload, selectinload
 from sqlalchemy.future import select
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
@@ -10,12 +10,16 @@ from src.schema import (
     UserDisplay,
 )
 from src.utils import (
-    hash_password,
-    verify_password,
-    seed_categories_for_user,
+    hash_password_async,
+    verify_and_update_password_async,
     Conflict,
     InternalServerError,
+    NotFound,
+    ServiceUnavailable,
+    principal_cache,
 )
+from src.utils.seed import seed_categories_for_user
+from .expense import ExpenseService
 
 
 class UserService:
@@ -25,7 +29,7 @@ class UserService:
     async def register_user(session: AsyncSession, register_form: UserCreate):
         """Registers a new user"""
         try:
-            password_hash = hash_password(register_form.password)
+            password_hash = await hash_password_async(register_form.password)
             new_user = User(
                 username=register_form.username,
                 email=register_form.email,
@@ -39,11 +43,17 @@ class UserService:
                 select(User)
                 .where(User.id == new_user.id)
                 .options(selectinload(User.expense_categories))
+                .execution_options(populate_existing=True)
             )
             result = await session.execute(query)
             user_with_relations = result.scalars().first()
+            ExpenseService.cache_categories(
+                new_user.id, user_with_relations.expense_categories
+            )
 
             return user_with_relations
+        except ServiceUnavailable as e:
+            raise e
         except IntegrityError:
             await session.rollback()
             raise Conflict("User with the same credentials already exists.")
@@ -64,13 +74,70 @@ class UserService:
             result = await session.execute(query)
             user = result.scalar_one_or_none()
 
-            if not user or not verify_password(login_form.password, user.password):
+            if not user:
                 return None
 
+            verified, new_hash = await verify_and_update_password_async(
+                login_form.password, user.password
+            )
+            if not verified:
+                return None
+
+            if new_hash:
+                user.password = new_hash
+                user.data_version = User.data_version + 1
+                await session.commit()
+
             return user
+        except ServiceUnavailable as e:
+            raise e
         except Exception as e:
             raise InternalServerError(f"{e}")
 
+    @staticmethod
+    async def get_data_version(session: AsyncSession, user_id: int) -> int | None:
+        """Returns the user's data version, which changes with their data."""
+        try:
+            return await session.scalar(
+                select(User.data_version).where(User.id == user_id)
+            )
+        except SQLAlchemyError as e:
+            raise InternalServerError(f"An error occurred: {str(e)}")
+
+    @staticmethod
+    async def read_user_profile(
+        session: AsyncSession, user_id: int, data_version: int | None = None
+    ):
+        """Returns the user with their categories, from the profile cache
+        when it holds them.
+
+        Profiles are cached with the data version they were read at. Given
+        the current `data_version`, a profile cached at another version is
+        read again, so it always matches an ETag built from that version.
+        """
+        cached = principal_cache.get(user_id)
+        if cached is not None:
+            cached_version, profile = cached
+            if data_version is None or data_version == cached_version:
+                return profile
+        try:
+            # User and categories in one statement.
+            query = (
+                select(User)
+                .where(User.id == user_id)
+                .options(joinedload(User.expense_categories))
+            )
+            result = await session.execute(query)
+            user = result.unique().scalar_one_or_none()
+            if not user:
+                raise NotFound("User not found")
+
+            profile = UserDisplay.model_validate(user)
+            principal_cache.set(user_id, (user.data_version, profile), group=user_id)
+            return profile
+        except SQLAlchemyError as e:
+            raise InternalServerError(f"An error occurred: {str(e)}")
+
     @staticmethod
     async def read_user_by_username(session: AsyncSession, username: str):
         try:
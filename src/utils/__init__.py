@@ -1,6 +1,13 @@
-from .password import hash_password, verify_password
-from .seed import seed_categories_for_user
+from .password import (
+    hash_password,
+    verify_password,
+    hash_password_async,
+    verify_password_async,
+    verify_and_update_password_async,
+    password_hasher,
+)
 from .exceptions import (
+    NotModified,
     BadRequest,
     Unauthorized,
     Forbidden,
@@ -13,11 +20,24 @@ from .exceptions import (
     ServiceUnavailable,
 )
 from .config import settings, get_settings
+from .cursor import encode_cursor, decode_cursor
+from .cache import TTLCache, principal_cache, category_cache
+from .serialization import dump_json, FastJSONResponse, fast_response
+from .statements import (
+    StatementCounter,
+    StatementBudgetExceeded,
+    count_statements,
+    install_statement_counting,
+)
 
 __all__ = [
     "hash_password",
     "verify_password",
-    "seed_categories_for_user",
+    "hash_password_async",
+    "verify_password_async",
+    "verify_and_update_password_async",
+    "password_hasher",
+    "NotModified",
     "BadRequest",
     "Unauthorized",
     "Forbidden",
@@ -30,4 +50,16 @@ __all__ = [
     "ServiceUnavailable",
     "settings",
     "get_settings",
+    "encode_cursor",
+    "decode_cursor",
+    "TTLCache",
+    "principal_cache",
+    "category_cache",
+    "dump_json",
+    "FastJSONResponse",
+    "fast_response",
+    "StatementCounter",
+    "StatementBudgetExceeded",
+    "count_statements",
+    "install_statement_counting",
 ]
@@ -0,0 +1,544 @@
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+
+import httpx
+from jose import jwt
+from sqlalchemy.future import select
+
+from src.data import (
+    AccessToken,
+    Expense,
+    User,
+    database,
+    init_db,
+    use_database,
+    dispose_engines,
+    AsyncSessionLocal,
+)
+from src.web.main import app, lifespan
+from src.web.dependencies.user_dependencies import create_access_token
+from .cache import principal_cache, category_cache
+from .config import settings
+from .statements import count_statements
+from .seed import seed_expenses, SEED_USER_PASSWORD
+
+BENCH_USERNAME = "seed_user_00000"
+
+
+def _percentile(samples: list, fraction: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+class BenchContext:
+    """State shared by the scenarios of a benchmark run."""
+
+    def __init__(self, token: str, csrf_token: str, expense_ids: list):
+        self.token = token
+        self.csrf_token = csrf_token
+        self.expense_ids = expense_ids
+        self.created_expense_ids = []
+        self.created_category_ids = []
+        self.logout_tokens = []
+        self.etag = ""
+        self.run_id = uuid.uuid4().hex[:8]
+
+    def headers(self, token: str | None = None) -> dict:
+        return {
+            "Cookie": f"Authorization={token or self.token}; "
+            f"csrftoken={self.csrf_token}",
+            "x-csrftoken": self.csrf_token,
+        }
+
+
+def _scenarios(ctx: BenchContext) -> list:
+    """Builds the request for the i-th call of each route.
+
+    Scenarios run in order, so later ones can use what earlier ones created
+    (for example, expenses added by `add_expense` are deleted at the end).
+    A `before` coroutine runs untimed ahead of the scenario's requests.
+    Scenarios marked `serialized` can also be run through the response model
+    path (`FAST_SERIALIZATION` off) for comparison.
+    A `budget` caps the statements a single request may execute.
+    """
+
+    def collect(target):
+        def on_response(response):
+            if response.status_code < 300:
+                target.append(response.json()["id"])
+
+        return on_response
+
+    async def fetch_etag(client):
+        response = await client.get(
+            "/expense/", params={"limit": 100}, headers=ctx.headers()
+        )
+        ctx.etag = response.headers.get("etag", "")
+
+    return [
+        {
+            "name": "POST /register",
+            "auth": True,
+            "request": lambda i: {
+                "method": "POST",
+                "url": "/register",
+                "json": {
+                    "username": f"bench_{ctx.run_id}_{i:06d}",
+                    "email": f"bench_{ctx.run_id}_{i:06d}@example.com",
+                    "password": SEED_USER_PASSWORD,
+                },
+            },
+        },
+        {
+            "name": "POST /token",
+            "auth": True,
+            "request": lambda i: {
+                "method": "POST",
+                "url": "/token",
+                "data": {"username": BENCH_USERNAME, "password": SEED_USER_PASSWORD},
+            },
+        },
+        {
+            "name": "GET /users/me",
+            "request": lambda i: {"method": "GET", "url": "/users/me"},
+        },
+        {
+            "name": "GET /expense/",
+            "serialized": True,
+            "request": lambda i: {
+                "method": "GET",
+                "url": "/expense/",
+                "params": {"limit": 100, "skip": (i % 50) * 100},
+            },
+        },
+        {
+            "name": "GET /expense/?fields=id,amount,created_at",
+            "request": lambda i: {
+                "method": "GET",
+                "url": "/expense/",
+                "params": {
+                    "limit": 100,
+                    "skip": (i % 50) * 100,
+                    "fields": "id,amount,created_at",
+                },
+            },
+        },
+        {
+            "name": "GET /expense/ (If-None-Match)",
+            "request": lambda i: {
+                "method": "GET",
+                "url": "/expense/",
+                "params": {"limit": 100},
+                "headers": {**ctx.headers(), "If-None-Match": ctx.etag},
+            },
+            "before": fetch_etag,
+            "budget": 1,
+        },
+        {
+            "name": "GET /expense/?paginate=cursor",
+            "serialized": True,
+            "request": lambda i: {
+                "method": "GET",
+                "url": "/expense/",
+                "params": {"limit": 100, "paginate": "cursor"},
+            },
+            "budget": 2,
+        },
+        {
+            "name": "GET /expense/query",
+            "serialized": True,
+            "request": lambda i: {
+                "method": "GET",
+                "url": "/expense/query",
+                "params": {
+                    "from": "2020-01-01T00:00:00",
+                    "min_amount": 10,
+                    "max_amount": 500,
+                    "sort": ["-created_at", "-amount"][i % 2],
+                    "limit": 100,
+                    "summary": True,
+                },
+            },
+        },
+        {
+            "name": "GET /expense/search",
+            "serialized": True,
+            "request": lambda i: {
+                "method": "GET",
+                "url": "/expense/search",
+                "params": {"description": ["pay", "the", "we", "su"][i % 4]},
+            },
+        },
+        {
+            "name": "GET /expense/weekly",
+            "serialized": True,
+            "request": lambda i: {
+                "method": "GET",
+                "url": "/expense/weekly",
+                "params": {"weeks": 4},
+            },
+        },
+        {
+            "name": "GET /expense/weekly?summary_only",
+            "request": lambda i: {
+                "method": "GET",
+                "url": "/expense/weekly",
+                "params": {"weeks": 208, "summary_only": True, "bucket": "week"},
+            },
+        },
+        {
+            "name": "GET /expense/stats",
+            "request": lambda i: {"method": "GET", "url": "/expense/stats"},
+        },
+        {
+            "name": "GET /expense/analytics",
+            "serialized": True,
+            "budget": 2,
+            "request": lambda i: {
+                "method": "GET",
+                "url": "/expense/analytics",
+                "params": {
+                    "bucket": ["day", "week", "month"][i % 3],
+                    "group_by": "category",
+                    "window": 4,
+                },
+            },
+        },
+        {
+            "name": "GET /expense/category/{category}",
+            "serialized": True,
+            "request": lambda i: {
+                "method": "GET",
+                "url": "/expense/category/Groceries",
+                "params": {"limit": 100},
+            },
+        },
+        {
+            "name": "GET /expense/category",
+            "serialized": True,
+            "request": lambda i: {"method": "GET", "url": "/expense/category"},
+        },
+        {
+            "name": "GET /expense/export",
+            "request": lambda i: {
+                "method": "GET",
+                "url": "/expense/export",
+                "params": {"format": "csv"},
+            },
+        },
+        {
+            "name": "POST /expense/",
+            "request": lambda i: {
+                "method": "POST",
+                "url": "/expense/",
+                "json": {
+                    "description": f"bench expense {i}",
+                    "amount": 12.5,
+                    "category": "Groceries",
+                },
+            },
+            "on_response": collect(ctx.created_expense_ids),
+            "budget": 2,
+        },
+        {
+            "name": "POST /expense/bulk",
+            "request": lambda i: {
+                "method": "POST",
+                "url": "/expense/bulk",
+                "json": [
+                    {
+                        "description": f"bench bulk {i} {n}",
+                        "amount": n,
+                        "category": "Leisure",
+                    }
+                    for n in range(100)
+                ],
+            },
+        },
+        {
+            "name": "PUT /expense/{expense_id}",
+            "request": lambda i: {
+                "method": "PUT",
+                "url": f"/expense/{ctx.expense_ids[i % len(ctx.expense_ids)]}",
+                "json": {"amount": 42.0},
+            },
+            "budget": 2,
+        },
+        {
+            "name": "POST /expense/category",
+            "request": lambda i: {
+                "method": "POST",
+                "url": "/expense/category",
+                "data": {"name": f"bench {ctx.run_id} {i}"},
+            },
+            "on_response": collect(ctx.created_category_ids),
+        },
+        {
+            "name": "PUT /expense/category/{category_id}",
+            "request": lambda i: {
+                "method": "PUT",
+                "url": "/expense/category/"
+                f"{ctx.created_category_ids[i % len(ctx.created_category_ids)]}",
+                "data": {"new_name": f"bench {ctx.run_id} {i} renamed"},
+            },
+        },
+        {
+            "name": "DELETE /expense/category/{category_id}",
+            "request": lambda i: {
+                "method": "DELETE",
+                "url": f"/expense/category/{ctx.created_category_ids[i]}",
+            },
+            "limit": lambda: len(ctx.created_category_ids),
+        },
+        {
+            "name": "DELETE /expense/{expense_id}",
+            "request": lambda i: {
+                "method": "DELETE",
+                "url": f"/expense/{ctx.created_expense_ids[i]}",
+            },
+            "limit": lambda: len(ctx.created_expense_ids),
+            "budget": 1,
+        },
+        {
+            "name": "POST /logout",
+            "request": lambda i: {
+                "method": "POST",
+                "url": "/logout",
+                "headers": ctx.headers(ctx.logout_tokens[i]),
+            },
+            "limit": lambda: len(ctx.logout_tokens),
+        },
+    ]
+
+
+async def _run_scenario(
+    client: httpx.AsyncClient,
+    ctx: BenchContext,
+    scenario: dict,
+    requests: int,
+    concurrency: int,
+) -> dict:
+    if "limit" in scenario:
+        requests = min(requests, scenario["limit"]())
+    if "before" in scenario:
+        await scenario["before"](client)
+    latencies = []
+    statements = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, errors
+        while next_index < requests:
+            index = next_index
+            next_index += 1
+            kwargs = scenario["request"](index)
+            kwargs.setdefault("headers", ctx.headers())
+            started = time.perf_counter()
+            with count_statements() as counter:
+                response = await client.request(**kwargs)
+            latencies.append(time.perf_counter() - started)
+            statements.append(counter.count)
+            if response.status_code >= 400:
+                errors += 1
+            if "on_response" in scenario:
+                scenario["on_response"](response)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    if not latencies:
+        return {"requests": 0}
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "concurrency": concurrency,
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+        "requests_per_sec": round(len(latencies) / elapsed, 1),
+        "queries_per_request": round(statistics.fmean(statements), 2),
+        "max_queries": max(statements),
+        "query_budget": scenario.get("budget"),
+        "over_budget": sum(
+            count > scenario["budget"] for count in statements if "budget" in scenario
+        ),
+    }
+
+
+async def _prepare(
+    client: httpx.AsyncClient, requests: int, auth_requests: int
+) -> BenchContext:
+    response = await client.post(
+        "/token", data={"username": BENCH_USERNAME, "password": SEED_USER_PASSWORD}
+    )
+    response.raise_for_status()
+    token = response.json()["access_token"]
+    response = await client.get("/healthy")
+    csrf_token = response.cookies["csrftoken"]
+
+    async with AsyncSessionLocal() as session:
+        user_id = await session.scalar(
+            select(User.id).where(User.username == BENCH_USERNAME)
+        )
+        result = await session.execute(
+            select(Expense.id).where(Expense.user_id == user_id).limit(requests)
+        )
+        ctx = BenchContext(token, csrf_token, result.scalars().all())
+
+        # Logout revokes its token, so each logout call needs a fresh one.
+        for _ in range(auth_requests):
+            logout_token = create_access_token({"sub": BENCH_USERNAME, "uid": user_id})
+            claims = jwt.get_unverified_claims(logout_token)
+            session.add(
+                AccessToken(
+                    id=claims["jti"],
+                    user_id=user_id,
+                    created_at=datetime.now(timezone.utc),
+                )
+            )
+            ctx.logout_tokens.append(logout_token)
+        await session.commit()
+
+    return ctx
+
+
+async def run_benchmark(
+    rows: int = 100_000,
+    users: int = 10,
+    seed: int = 0,
+    workers: int = 1,
+    requests: int = 200,
+    auth_requests: int = 20,
+    concurrency: int = 10,
+    routes: list | None = None,
+    keep: bool = False,
+    compare_serialization: bool = False,
+) -> dict:
+    """Seeds a throwaway database and benchmarks every API route in-process.
+
+    Requests go through the ASGI app directly (no network), `concurrency` at
+    a time. Registration, login and logout hash passwords or mint tokens, so
+    they run `auth_requests` times instead of `requests`. With
+    `compare_serialization`, list routes run a second time with
+    `FAST_SERIALIZATION` off, reported with a `[models]` suffix.
+    """
+    directory = tempfile.mkdtemp(prefix="expense-bench-")
+    path = os.path.join(directory, "bench.db")
+    engine = use_database(f"sqlite+aiosqlite:///{path}")
+
+    try:
+        await init_db()
+        async with AsyncSessionLocal() as session:
+            await seed_expenses(
+                session, num_expenses=rows, num_users=users, seed=seed, workers=workers
+            )
+
+        results = {}
+        async with lifespan(app):
+            transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://localhost", timeout=None
+            ) as client:
+                ctx = await _prepare(client, requests, auth_requests)
+                for scenario in _scenarios(ctx):
+                    if routes and scenario["name"] not in routes:
+                        continue
+                    count = auth_requests if scenario.get("auth") else requests
+                    print(f"Benchmarking {scenario['name']}...")
+                    results[scenario["name"]] = await _run_scenario(
+                        client, ctx, scenario, count, concurrency
+                    )
+                    if compare_serialization and scenario.get("serialized"):
+                        print(f"Benchmarking {scenario['name']} [models]...")
+                        fast_serialization = settings.FAST_SERIALIZATION
+                        settings.FAST_SERIALIZATION = False
+                        try:
+                            results[
+                                f"{scenario['name']} [models]"
+                            ] = await _run_scenario(
+                                client, ctx, scenario, count, concurrency
+                            )
+                        finally:
+                            settings.FAST_SERIALIZATION = fast_serialization
+
+        return {
+            "dataset": {"rows": rows, "users": users, "seed": seed},
+            "database": {
+                "pool_size": settings.DATABASE_POOL_SIZE,
+                "max_overflow": settings.DATABASE_MAX_OVERFLOW,
+                "journal_mode": settings.SQLITE_JOURNAL_MODE,
+                "synchronous": settings.SQLITE_SYNCHRONOUS,
+                "cache_size": settings.SQLITE_CACHE_SIZE,
+                "mmap_size": settings.SQLITE_MMAP_SIZE,
+                "temp_store": settings.SQLITE_TEMP_STORE,
+                "busy_timeout_ms": settings.SQLITE_BUSY_TIMEOUT_MS,
+                "read_engine": database.read_engine is not engine,
+            },
+            "fast_serialization": settings.FAST_SERIALIZATION,
+            "concurrency": concurrency,
+            "routes": results,
+            "caches": {
+                "principal": principal_cache.stats(),
+                "category": category_cache.stats(),
+            },
+        }
+    finally:
+        await dispose_engines()
+        if keep:
+            print(f"Benchmark database kept at {path}")
+        else:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+def format_report(report: dict) -> str:
+    """Renders a benchmark report as a plain-text table."""
+    database = ", ".join(f"{key}={value}" for key, value in report["database"].items())
+    header = (
+        f"{'route':<42} {'reqs':>5} {'err':>4} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'p99 ms':>8} {'req/s':>8} {'q/req':>6} {'max q':>5} {'budget':>6}"
+    )
+    lines = [f"database: {database}", header, "-" * len(header)]
+    for name, stats in report["routes"].items():
+        if not stats.get("requests"):
+            lines.append(f"{name:<42} {0:>5}")
+            continue
+        lines.append(
+            f"{name:<42} {stats['requests']:>5} {stats['errors']:>4} "
+            f"{stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['p99_ms']:>8} "
+            f"{stats['requests_per_sec']:>8} {stats['queries_per_request']:>6} "
+            f"{stats['max_queries']:>5} {stats['query_budget'] or '-':>6}"
+            + (f"  {stats['over_budget']} over budget" if stats["over_budget"] else "")
+        )
+    for name, stats in report["caches"].items():
+        lines.append(
+            f"{name} cache: "
+            + ", ".join(f"{key}={value}" for key, value in stats.items())
+        )
+    return "\n".join(lines)
+
+
+def budget_violations(report: dict) -> list:
+    """Returns the routes where a request ran more statements than budgeted."""
+    return [
+        name for name, stats in report["routes"].items() if stats.get("over_budget")
+    ]
+
+
+def write_report(report: dict, output: str | None):
+    print(format_report(report))
+    if output:
+        with open(output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Wrote {output}")
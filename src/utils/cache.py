@@ -0,0 +1,102 @@
+import time
+from collections import OrderedDict
+
+from .config import settings
+
+
+class TTLCache:
+    """A bounded LRU cache whose entries also expire after a time-to-live.
+
+    Entries can be tagged with a group (for example a user id) so that every
+    entry belonging to that group can be dropped at once. The cache is meant
+    to be used from the event loop thread only.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self._groups: dict = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Returns a live entry and marks it as recently used."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        value, expires_at, _ = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl: float | None = None, group=None):
+        """Stores an entry, evicting the least recently used one if full."""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, time.monotonic() + ttl, group)
+        if group is not None:
+            self._groups.setdefault(group, set()).add(key)
+
+        while len(self._entries) > self.maxsize:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def pop(self, key):
+        """Removes a single entry, if present."""
+        if key in self._entries:
+            self._remove(key)
+
+    def invalidate_group(self, group):
+        """Removes every entry stored under `group`."""
+        for key in list(self._groups.get(group, ())):
+            self._remove(key)
+
+    def clear(self):
+        self._entries.clear()
+        self._groups.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _remove(self, key):
+        _, _, group = self._entries.pop(key)
+        if group is not None:
+            keys = self._groups.get(group)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._groups[group]
+
+
+# `(data_version, UserDisplay)` profiles for `/users/me`, keyed and grouped by
+# user id.
+principal_cache = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+# Each user's categories keyed by normalized name, keyed by user id.
+category_cache = TTLCache(
+    maxsize=settings.CATEGORY_CACHE_SIZE,
+    ttl=settings.CATEGORY_CACHE_TTL_SECONDS,
+)
@@ -10,6 +10,31 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     TOKEN_COOKIE_NAME: str = "Authorization"
     CSRF_TOKEN_SECRET: str
+    DATABASE_URL: str = "sqlite+aiosqlite:///./database.db"
+    DATABASE_READ_URL: str | None = None
+    DATABASE_POOL_SIZE: int = 5
+    DATABASE_MAX_OVERFLOW: int = 10
+    DATABASE_POOL_TIMEOUT: int = 30
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_CACHE_SIZE: int = -64000
+    SQLITE_MMAP_SIZE: int = 268435456
+    SQLITE_TEMP_STORE: str = "MEMORY"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SLOW_QUERY_THRESHOLD_MS: int = 100
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    CATEGORY_CACHE_SIZE: int = 10000
+    CATEGORY_CACHE_TTL_SECONDS: int = 300
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    BULK_INSERT_CHUNK_SIZE: int = 1000
+    BULK_MAX_ROWS: int = 50000
+    EXPORT_BATCH_SIZE: int = 1000
+    FAST_SERIALIZATION: bool = True
+    TOKEN_REAPER_INTERVAL_SECONDS: int = 300
+    TOKEN_REAPER_BATCH_SIZE: int = 500
+    REVOCATION_POLL_INTERVAL_SECONDS: float = 2.0
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
@@ -0,0 +1,56 @@
+import base64
+import json
+
+from .exceptions import BadRequest
+
+CURSOR_DIRECTIONS = ("next", "prev")
+DEFAULT_CURSOR_SORT = "-created_at"
+
+
+def encode_cursor(
+    position: str | float,
+    expense_id: int,
+    direction: str = "next",
+    sort: str = DEFAULT_CURSOR_SORT,
+) -> str:
+    """Encodes a keyset position into an opaque, URL-safe cursor.
+
+    `position` is the value of the sort key (the stored `created_at` text by
+    default) of the expense the cursor points at.
+    """
+    payload = {"c": position, "i": expense_id, "d": direction}
+    if sort != DEFAULT_CURSOR_SORT:
+        payload["s"] = sort
+    encoded = json.dumps(payload, separators=(",", ":"))
+    return base64.urlsafe_b64encode(encoded.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """Decodes a cursor produced by `encode_cursor`.
+
+    Returns a dict with `position`, `id`, `direction` and `sort` keys.
+    Raises BadRequest if the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        position, expense_id, direction = payload["c"], payload["i"], payload["d"]
+        sort = payload.get("s", DEFAULT_CURSOR_SORT)
+    except (ValueError, TypeError, KeyError, AttributeError):
+        raise BadRequest("Invalid pagination cursor.")
+
+    if (
+        isinstance(position, bool)
+        or not isinstance(position, (str, int, float))
+        or not isinstance(expense_id, int)
+        or direction not in CURSOR_DIRECTIONS
+        or not isinstance(sort, str)
+    ):
+        raise BadRequest("Invalid pagination cursor.")
+
+    return {
+        "position": position,
+        "id": expense_id,
+        "direction": direction,
+        "sort": sort,
+    }
@@ -1,6 +1,11 @@
 from fastapi import HTTPException
 
 
+class NotModified(HTTPException):
+    def __init__(self, headers: dict | None = None):
+        super().__init__(status_code=304, detail="Not modified", headers=headers)
+
+
 class BadRequest(HTTPException):
     def __init__(self, detail: str = "Bad request"):
         super().__init__(status_code=400, detail=detail)
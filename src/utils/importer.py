@@ -0,0 +1,238 @@
+import csv
+import hashlib
+import re
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.future import select
+
+from src.data import (
+    Expense,
+    ExpenseCategory,
+    ImportJob,
+    User,
+    normalize_category_name,
+)
+from .seed import DEFAULT_CATEGORY
+
+OFX_EXTENSIONS = {".ofx", ".qfx"}
+_OFX_TAG = re.compile(r"<(/?)([A-Z0-9.]+)>([^<\r\n]*)", re.IGNORECASE)
+
+
+def _file_checksum(path: Path) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _parse_timestamp(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    created_at = datetime.fromisoformat(value.strip())
+    if created_at.tzinfo:
+        created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+    return created_at
+
+
+def _read_csv(path: Path):
+    """Yields one record (or an error message) per CSV data row.
+
+    Expects a header with `description` and `amount` columns, and optionally
+    `category` and `created_at` (or `date`). The export format is accepted.
+    """
+    with path.open(newline="", encoding="utf-8-sig") as f:
+        reader = csv.DictReader(f)
+        reader.fieldnames = [name.strip().lower() for name in reader.fieldnames or []]
+        for row in reader:
+            try:
+                description = (row.get("description") or "").strip()
+                if not description:
+                    raise ValueError("description is required")
+                yield {
+                    "description": description[:200],
+                    "amount": float(row["amount"]),
+                    "category": (row.get("category") or "").strip() or DEFAULT_CATEGORY,
+                    "created_at": _parse_timestamp(
+                        row.get("created_at") or row.get("date")
+                    ),
+                }
+            except (KeyError, TypeError, ValueError) as e:
+                yield f"line {reader.line_num}: {e}"
+
+
+def _parse_ofx_date(value: str) -> datetime:
+    digits = re.match(r"\d+", value).group()
+    return datetime.strptime(digits[:14].ljust(14, "0"), "%Y%m%d%H%M%S")
+
+
+def _read_ofx(path: Path):
+    """Yields one record (or an error message) per OFX `STMTTRN` transaction.
+
+    Handles both SGML (OFX 1.x) and XML (OFX 2.x) files. Debits are imported
+    as positive expense amounts; credits are not expenses and are skipped.
+    """
+    transaction = None
+    with path.open(encoding="utf-8", errors="replace") as f:
+        for line in f:
+            for closing, tag, value in _OFX_TAG.findall(line):
+                tag = tag.upper()
+                if tag == "STMTTRN":
+                    if not closing:
+                        transaction = {}
+                        continue
+                    if transaction is None:
+                        continue
+                    record, transaction = transaction, None
+                    try:
+                        amount = float(record["TRNAMT"])
+                        if amount >= 0:
+                            continue
+                        description = record.get("NAME") or record.get("MEMO")
+                        if not description:
+                            raise ValueError("transaction has no NAME or MEMO")
+                        yield {
+                            "description": description[:200],
+                            "amount": -amount,
+                            "category": DEFAULT_CATEGORY,
+                            "created_at": _parse_ofx_date(record["DTPOSTED"]),
+                        }
+                    except (KeyError, AttributeError, ValueError) as e:
+                        yield f"transaction {record.get('FITID', '?')}: {e}"
+                elif transaction is not None and not closing and value.strip():
+                    transaction[tag] = value.strip()
+
+
+async def _write_chunk(
+    session: AsyncSession,
+    job: ImportJob,
+    records: list,
+    category_ids: dict,
+    rows_processed: int,
+):
+    """Inserts a chunk and records progress in the same transaction."""
+    missing = {}
+    for record in records:
+        key = normalize_category_name(record["category"])
+        if key not in category_ids:
+            missing.setdefault(key, record["category"])
+
+    if missing:
+        result = await session.execute(
+            insert(ExpenseCategory).returning(ExpenseCategory.id, ExpenseCategory.name),
+            [{"name": name, "user_id": job.user_id} for name in missing.values()],
+        )
+        category_ids.update(
+            {normalize_category_name(name): id for id, name in result.all()}
+        )
+
+    if records:
+        rows = []
+        for record in records:
+            row = {
+                "description": record["description"],
+                "amount": record["amount"],
+                "user_id": job.user_id,
+                "category_id": category_ids[
+                    normalize_category_name(record["category"])
+                ],
+            }
+            if record["created_at"] is not None:
+                row["created_at"] = record["created_at"]
+            rows.append(row)
+        await session.execute(insert(Expense), rows)
+
+    job.rows_processed = rows_processed
+    job.rows_inserted += len(records)
+    await session.commit()
+
+
+async def import_expenses(
+    session: AsyncSession,
+    username: str,
+    path: str,
+    chunk_size: int = 1000,
+    file_format: str | None = None,
+    restart: bool = False,
+):
+    """Imports expenses for a user from a CSV or OFX file.
+
+    Rows are inserted `chunk_size` at a time with one commit per chunk. The
+    job's progress is committed with each chunk, so an interrupted import of
+    the same file resumes after the last committed chunk.
+    """
+    path = Path(path)
+    if not path.is_file():
+        raise ValueError(f"File {path} does not exist.")
+
+    user_id = await session.scalar(select(User.id).where(User.username == username))
+    if user_id is None:
+        raise ValueError(f"User {username} was not found.")
+
+    if file_format is None:
+        file_format = "ofx" if path.suffix.lower() in OFX_EXTENSIONS else "csv"
+    records = _read_ofx(path) if file_format == "ofx" else _read_csv(path)
+
+    checksum = _file_checksum(path)
+    job = await session.scalar(
+        select(ImportJob)
+        .where(ImportJob.user_id == user_id, ImportJob.checksum == checksum)
+        .order_by(ImportJob.id.desc())
+    )
+    if job and job.completed and not restart:
+        print(
+            f"{path.name} was already imported ({job.rows_inserted} expenses). "
+            "Use --restart to import it again."
+        )
+        return
+    if job is None or restart:
+        job = ImportJob(user_id=user_id, source=path.name, checksum=checksum)
+        session.add(job)
+        await session.commit()
+    elif job.rows_processed:
+        print(f"Resuming {path.name} after row {job.rows_processed}.")
+
+    result = await session.execute(
+        select(ExpenseCategory.id, ExpenseCategory.name).where(
+            ExpenseCategory.user_id == user_id
+        )
+    )
+    category_ids = {normalize_category_name(name): id for id, name in result.all()}
+
+    started = time.perf_counter()
+    inserted = skipped = 0
+    rows_processed = job.rows_processed
+    chunk = []
+
+    for index, record in enumerate(records):
+        if index < job.rows_processed:
+            continue
+        rows_processed = index + 1
+        if isinstance(record, str):
+            skipped += 1
+            print(f"Skipping {record}")
+        else:
+            chunk.append(record)
+
+        if len(chunk) >= chunk_size:
+            await _write_chunk(session, job, chunk, category_ids, rows_processed)
+            inserted += len(chunk)
+            chunk = []
+            elapsed = time.perf_counter() - started
+            print(f"Inserted {inserted} expenses ({inserted / elapsed:,.0f} rows/sec)")
+
+    await _write_chunk(session, job, chunk, category_ids, rows_processed)
+    inserted += len(chunk)
+    job.completed = True
+    await session.commit()
+
+    elapsed = time.perf_counter() - started
+    print(
+        f"Imported {inserted} expenses from {path.name} in {elapsed:.1f}s "
+        f"({inserted / elapsed if elapsed else 0:,.0f} rows/sec), "
+        f"skipped {skipped} invalid rows."
+    )
@@ -0,0 +1,234 @@
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestTimings:
+    """Where the time of one request went, reported as `Server-Timing`."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.auth_seconds = 0.0
+        self.endpoint_finished: float | None = None
+
+    def server_timing(self, response_started: float) -> str:
+        queries = "query" if self.db_queries == 1 else "queries"
+        entries = [
+            f"auth;dur={self.auth_seconds * 1000:.2f}",
+            f'db;dur={self.db_seconds * 1000:.2f};desc="{self.db_queries} {queries}"',
+        ]
+        if self.endpoint_finished is not None:
+            serialize = response_started - self.endpoint_finished
+            entries.append(f"serialize;dur={serialize * 1000:.2f}")
+        entries.append(f"total;dur={(response_started - self.started) * 1000:.2f}")
+        return ", ".join(entries)
+
+
+_request_timings: ContextVar[RequestTimings | None] = ContextVar(
+    "request_timings", default=None
+)
+
+
+def start_request_timings() -> RequestTimings:
+    """Starts collecting timings for the request running in this context."""
+    timings = RequestTimings()
+    _request_timings.set(timings)
+    return timings
+
+
+def current_request_timings() -> RequestTimings | None:
+    return _request_timings.get()
+
+
+@contextmanager
+def timed_phase(phase: str):
+    """Adds the time spent in the block to the current request's `phase`."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings = _request_timings.get()
+        if timings is not None:
+            attribute = f"{phase}_seconds"
+            setattr(
+                timings,
+                attribute,
+                getattr(timings, attribute) + time.perf_counter() - started,
+            )
+
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{name}="{_escape_label(value)}"' for name, value in labels)
+    return "{" + pairs + "}"
+
+
+class Counter:
+    """A monotonically increasing Prometheus counter."""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._values: dict = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple((name, labels[name]) for name in self.labelnames)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+        ]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    """A Prometheus histogram with fixed upper bounds."""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple = (),
+        buckets: tuple = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._series: dict = {}
+
+    def observe(self, value: float, **labels):
+        key = tuple((name, labels[name]) for name in self.labelnames)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            series[0][index] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self) -> list:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for key, (counts, total, count) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(key + (("le", repr(bound)),))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(key + (("le", "+Inf"),))
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Holds the process' metrics and renders them in Prometheus text format.
+
+    Collectors are callables that return `(name, type, help, samples)`
+    tuples, where samples are `(labels_dict, value)` pairs read at scrape
+    time, for values that live elsewhere (pool sizes, cache counters).
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name: str, documentation: str, labelnames: tuple = ()):
+        metric = Counter(name, documentation, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple = (),
+        buckets: tuple = DEFAULT_BUCKETS,
+    ):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, kind, documentation, samples in collector():
+                lines.append(f"# HELP {name} {documentation}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(
+                        f"{name}{_format_labels(tuple(labels.items()))} {value}"
+                    )
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+http_request_duration = metrics.histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to sending the last of its response body.",
+    ("method", "route", "status"),
+)
+db_query_duration = metrics.histogram(
+    "db_query_duration_seconds",
+    "Time spent executing a single SQL statement.",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+db_slow_queries = metrics.counter(
+    "db_slow_queries_total",
+    "SQL statements slower than SLOW_QUERY_THRESHOLD_MS.",
+)
+db_pool_checkout_wait = metrics.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the pool.",
+    ("engine",),
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+auth_token_checks = metrics.counter(
+    "auth_token_checks_total",
+    "Access tokens checked for revocation, by where the check was answered.",
+    ("source",),
+)
+revocation_sync_errors = metrics.counter(
+    "revocation_sync_errors_total",
+    "Polls of the token revocation log that failed.",
+)
+access_tokens_reaped = metrics.counter(
+    "access_tokens_reaped_total",
+    "Expired or revoked access tokens and expired revocations deleted by the "
+    "token reaper.",
+    ("reason",),
+)
+token_reaper_pass_duration = metrics.histogram(
+    "token_reaper_pass_duration_seconds",
+    "Time taken by one pass of the token reaper over the access tokens.",
+)
+token_reaper_errors = metrics.counter(
+    "token_reaper_errors_total",
+    "Token reaper passes that failed.",
+)
@@ -1,5 +1,12 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 from passlib.context import CryptContext
 
+from .config import settings
+from .exceptions import ServiceUnavailable
+
 pwd_context = CryptContext(schemes=["bcrypt", "argon2"], deprecated="auto")
 
 
@@ -11,3 +18,89 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verifies if a plain text password matches the hashed version."""
     return pwd_context.verify(plain_password, hashed_password)
+
+
+class PasswordHasher:
+    """Runs password hashing on a dedicated thread pool.
+
+    bcrypt and argon2 release the GIL, so a small thread pool keeps hashing
+    off the event loop. At most `workers` hashes run at once; up to
+    `max_pending` more wait for a slot, and anything beyond that is rejected
+    with 503 instead of piling up behind a login burst.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="password-hash"
+        )
+        self._semaphore = asyncio.Semaphore(workers)
+        self.pending = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.rejected = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+    async def run(self, func, *args):
+        if self._semaphore.locked() and self.pending >= self.max_pending:
+            self.rejected += 1
+            raise ServiceUnavailable("Too many concurrent logins, please retry.")
+
+        self.pending += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.pending -= 1
+
+        self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func, *args)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.in_flight -= 1
+            self.completed += 1
+            self.total_seconds += elapsed
+            self.max_seconds = max(self.max_seconds, elapsed)
+            self._semaphore.release()
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "in_flight": self.in_flight,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "total_seconds": self.total_seconds,
+            "max_seconds": self.max_seconds,
+        }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
+
+async def hash_password_async(password: str) -> str:
+    """Hashes a password without blocking the event loop."""
+    return await password_hasher.run(pwd_context.hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verifies a password without blocking the event loop."""
+    return await password_hasher.run(
+        pwd_context.verify, plain_password, hashed_password
+    )
+
+
+async def verify_and_update_password_async(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """Verifies a password and returns a new hash if its scheme is deprecated."""
+    return await password_hasher.run(
+        pwd_context.verify_and_update, plain_password, hashed_password
+    )
@@ -1,6 +1,9 @@
 from datetime import datetime, timedelta, timezone
+from multiprocessing import Pool
 import random
+import time
 
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from faker import Faker
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -8,7 +11,11 @@ from sqlalchemy.future import select
 
 from src.data import Expense, User, ExpenseCategory
 from src.data import ExpenseCategory
+from src.data import suspend_fulltext_sync, resume_fulltext_sync
+from src.data import suspend_rollup_sync, resume_rollup_sync
+from src.data import suspend_version_sync, resume_version_sync
 from .exceptions import InternalServerError
+from .password import hash_password
 
 DEFAULT_CATEGORIES = [
     "Groceries",
@@ -20,6 +27,12 @@ DEFAULT_CATEGORIES = [
     "Others",
 ]
 
+DEFAULT_CATEGORY = "Others"
+
+
+SEED_USER_PASSWORD = "password123"
+SEED_HISTORY_DAYS = 4 * 365
+DESCRIPTION_VOCABULARY_SIZE = 2000
 
 fake = Faker()
 
@@ -36,35 +49,163 @@ async def seed_categories_for_user(session: AsyncSession, user_id: int):
         raise InternalServerError()
 
 
-async def seed_expenses(session: AsyncSession, num_expenses: int = 1000):
+def build_description_vocabulary(seed: int) -> list:
+    """Builds a fixed pool of fake descriptions to draw rows from."""
+    generator = Faker()
+    generator.seed_instance(seed)
+    return [generator.sentence() for _ in range(DESCRIPTION_VOCABULARY_SIZE)]
+
+
+# Per-process state for the generator workers, set by `_init_generator`.
+_generator = {}
+
+
+def _init_generator(owners: list, vocabulary: list, anchor: datetime, seed: int):
+    _generator.update(owners=owners, vocabulary=vocabulary, anchor=anchor, seed=seed)
+
+
+def _generate_chunk(task: tuple) -> list:
+    """Generates one chunk of expense rows.
+
+    Each chunk gets its own random generator derived from the seed and the
+    chunk index, so the output is the same whatever the number of workers.
     """
-    Generate and insert fake expense data into the database for the past 4 years.
+    chunk_index, size = task
+    owners = _generator["owners"]
+    vocabulary = _generator["vocabulary"]
+    anchor = _generator["anchor"]
+    rng = random.Random(_generator["seed"] * 1_000_003 + chunk_index)
+
+    rows = []
+    for _ in range(size):
+        user_id, category_ids = owners[rng.randrange(len(owners))]
+        rows.append(
+            {
+                "description": vocabulary[rng.randrange(len(vocabulary))],
+                "amount": round(rng.uniform(5, 500), 2),
+                "user_id": user_id,
+                "category_id": category_ids[rng.randrange(len(category_ids))],
+                "created_at": anchor
+                - timedelta(seconds=rng.randrange(SEED_HISTORY_DAYS * 86400)),
+            }
+        )
+    return rows
+
+
+async def seed_users(session: AsyncSession, num_users: int) -> list:
+    """Ensures `num_users` seed users with default categories exist.
+
+    Seed users are named `seed_user_00000`, `seed_user_00001`, ... and share
+    the password `SEED_USER_PASSWORD`. Returns their ids.
     """
-    query = select(User)
-    users = await session.execute(query)
-    users = users.scalars().all()
+    usernames = [f"seed_user_{index:05d}" for index in range(num_users)]
+    result = await session.execute(
+        select(User.username).where(User.username.in_(usernames))
+    )
+    existing = set(result.scalars().all())
+
+    missing = [username for username in usernames if username not in existing]
+    if missing:
+        password_hash = hash_password(SEED_USER_PASSWORD)
+        result = await session.execute(
+            insert(User).returning(User.id),
+            [
+                {
+                    "username": username,
+                    "email": f"{username}@example.com",
+                    "password": password_hash,
+                }
+                for username in missing
+            ],
+        )
+        new_ids = result.scalars().all()
+        await session.execute(
+            insert(ExpenseCategory),
+            [
+                {"name": name, "user_id": user_id}
+                for user_id in new_ids
+                for name in DEFAULT_CATEGORIES
+            ],
+        )
+        await session.commit()
 
-    categories = await session.execute(select(ExpenseCategory))
-    categories = categories.scalars().all()
+    result = await session.execute(select(User.id).where(User.username.in_(usernames)))
+    return result.scalars().all()
 
-    if not users or not categories:
-        raise ValueError("No users or categories found in the database!")
 
-    expenses = []
+async def seed_expenses(
+    session: AsyncSession,
+    num_expenses: int = 1000,
+    num_users: int | None = None,
+    seed: int = 0,
+    workers: int = 1,
+    chunk_size: int = 5000,
+):
+    """
+    Generate and insert fake expense data into the database for the past 4 years.
+
+    Rows are spread over `num_users` seed users, or over every existing user
+    when `num_users` is not given. Generation is deterministic for a given
+    seed and runs in `workers` processes, while the rows are written with
+    Core `insert()` batches of `chunk_size`, one commit per batch.
+    """
+    if num_users:
+        user_ids = await seed_users(session, num_users)
+        query = select(ExpenseCategory.user_id, ExpenseCategory.id).where(
+            ExpenseCategory.user_id.in_(user_ids)
+        )
+    else:
+        query = select(ExpenseCategory.user_id, ExpenseCategory.id)
+
+    result = await session.execute(query.order_by(ExpenseCategory.id))
+    categories_by_user = {}
+    for user_id, category_id in result.all():
+        categories_by_user.setdefault(user_id, []).append(category_id)
+    owners = sorted(categories_by_user.items())
 
-    for _ in range(num_expenses):
-        days_ago = random.randint(0, 4 * 365)
-        expense_date = datetime.now(timezone.utc) - timedelta(days=days_ago)
+    if not owners:
+        raise ValueError("No users or categories found in the database!")
 
-        new_expense = Expense(
-            description=fake.sentence(),
-            amount=round(random.uniform(5, 500), 2),
-            user_id=random.choice(users).id,
-            category_id=random.choice(categories).id,
-            created_at=expense_date,
+    vocabulary = build_description_vocabulary(seed)
+    anchor = datetime.now(timezone.utc).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    initargs = (owners, vocabulary, anchor, seed)
+    tasks = [
+        (index, min(chunk_size, num_expenses - start))
+        for index, start in enumerate(range(0, num_expenses, chunk_size))
+    ]
+
+    started = time.perf_counter()
+    inserted = 0
+
+    async def write(rows):
+        nonlocal inserted
+        await session.execute(insert(Expense.__table__), rows)
+        await session.commit()
+        inserted += len(rows)
+        elapsed = time.perf_counter() - started
+        print(
+            f"Inserted {inserted}/{num_expenses} expenses "
+            f"({inserted / elapsed:,.0f} rows/sec)"
         )
-        expenses.append(new_expense)
 
-    session.add_all(expenses)
-    await session.commit()
+    await suspend_fulltext_sync(session)
+    await suspend_rollup_sync(session)
+    await suspend_version_sync(session)
+    try:
+        if workers > 1:
+            with Pool(workers, initializer=_init_generator, initargs=initargs) as pool:
+                for rows in pool.imap(_generate_chunk, tasks):
+                    await write(rows)
+        else:
+            _init_generator(*initargs)
+            for task in tasks:
+                await write(_generate_chunk(task))
+    finally:
+        await session.rollback()
+        await resume_fulltext_sync(session)
+        await resume_rollup_sync(session)
+        await resume_version_sync(session)
+
     print(f"Inserted {num_expenses} fake expenses.")
@@ -0,0 +1,48 @@
+from typing import Any
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from .config import settings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_json_adapter = TypeAdapter(Any)
+
+
+def dump_json(content) -> bytes:
+    """Encodes plain data (dicts, lists, numbers, strings, datetimes) as JSON.
+
+    Uses orjson when it is installed and a prebuilt Pydantic serializer
+    otherwise. Both write datetimes and floats the way response models do.
+    """
+    if orjson is not None:
+        return orjson.dumps(content)
+    return _json_adapter.dump_json(content)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response for content that is already shaped like its schema."""
+
+    def render(self, content) -> bytes:
+        return dump_json(content)
+
+
+def fast_response(content, response: Response, sparse: bool = False):
+    """Sends `content` without validating it against the response model.
+
+    For endpoints whose services build their responses from plain rows.
+    The headers set on `response` by the endpoint's dependencies are kept.
+    With `FAST_SERIALIZATION` off, `content` is returned to FastAPI as is,
+    to be validated and serialized through the route's response model,
+    unless it is `sparse` (only some of the model's fields were requested).
+    """
+    if not settings.FAST_SERIALIZATION and not sparse:
+        return content
+    fast = FastJSONResponse(content)
+    fast.headers.raw.extend(response.headers.raw)
+    return fast
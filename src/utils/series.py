@@ -0,0 +1,77 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+BUCKETS = ("day", "week", "month")
+
+
+def bucket_start(day: date, bucket: str) -> date:
+    """Returns the first day of the bucket `day` falls in.
+
+    Weeks start on Monday, as in the SQL bucket expressions.
+    """
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def bucket_count(bucket: str, first: date, last: date) -> int:
+    """Number of buckets from the one starting at `first` to `last`'s."""
+    if bucket == "month":
+        return (last.year - first.year) * 12 + last.month - first.month + 1
+    step = 7 if bucket == "week" else 1
+    return (last - first).days // step + 1
+
+
+def bucket_periods(bucket: str, first: date, last: date) -> np.ndarray:
+    """Start days of every bucket from `first` to `last`, gaps included."""
+    if bucket == "month":
+        months = np.arange(np.datetime64(first, "M"), np.datetime64(last, "M") + 1)
+        return months.astype("datetime64[D]")
+    step = np.timedelta64(7 if bucket == "week" else 1, "D")
+    return np.arange(np.datetime64(first, "D"), np.datetime64(last, "D") + 1, step)
+
+
+def bucket_positions(bucket: str, first: date, starts) -> np.ndarray:
+    """Maps bucket start days (`YYYY-MM-DD` strings) to their positions in
+    `bucket_periods(bucket, first, ...)`."""
+    starts = np.asarray(starts, dtype="datetime64[D]")
+    if bucket == "month":
+        return (starts.astype("datetime64[M]") - np.datetime64(first, "M")).astype(
+            np.int64
+        )
+    days = (starts - np.datetime64(first, "D")).astype(np.int64)
+    return days // 7 if bucket == "week" else days
+
+
+def _nullable(values: np.ndarray) -> list:
+    """Converts an array to lists, with NaN (undefined values) as None."""
+    converted = values.astype(object)
+    converted[np.isnan(values)] = None
+    return converted.tolist()
+
+
+def derive_series(amounts: np.ndarray, window: int) -> dict:
+    """Computes running totals, trailing moving averages and deltas.
+
+    `amounts` holds one series per row and one bucket per column. The moving
+    average of a bucket covers it and the `window - 1` before it, and is None
+    until that many buckets exist; the change of the first bucket is None.
+    """
+    period_count = amounts.shape[1]
+
+    moving_average = np.full(amounts.shape, np.nan)
+    if window <= period_count:
+        windows = np.lib.stride_tricks.sliding_window_view(amounts, window, axis=1)
+        moving_average[:, window - 1 :] = windows.mean(axis=-1)
+
+    change = np.full(amounts.shape, np.nan)
+    change[:, 1:] = np.diff(amounts, axis=1)
+
+    return {
+        "cumulative_amount": np.cumsum(amounts, axis=1).tolist(),
+        "moving_average": _nullable(moving_average),
+        "change": _nullable(change),
+    }
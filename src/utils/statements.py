@@ -0,0 +1,65 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+
+class StatementBudgetExceeded(AssertionError):
+    """Raised when a block of code runs more SQL statements than allowed."""
+
+
+class StatementCounter:
+    """Collects the SQL statements executed in one context."""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def assert_at_most(self, budget: int, label: str = "Block"):
+        """Raises `StatementBudgetExceeded` if more than `budget` ran."""
+        if self.count > budget:
+            executed = "\n".join(f"  {statement}" for statement in self.statements)
+            raise StatementBudgetExceeded(
+                f"{label} executed {self.count} statements, "
+                f"budget is {budget}:\n{executed}"
+            )
+
+
+_current_counter: ContextVar[StatementCounter | None] = ContextVar(
+    "statement_counter", default=None
+)
+
+
+def _record_statement(conn, cursor, statement, parameters, context, executemany):
+    counter = _current_counter.get()
+    if counter is not None:
+        counter.statements.append(" ".join(statement.split()))
+
+
+def install_statement_counting(engine):
+    """Makes statements run on `engine` visible to `count_statements`."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if not event.contains(sync_engine, "before_cursor_execute", _record_statement):
+        event.listen(sync_engine, "before_cursor_execute", _record_statement)
+
+
+@contextmanager
+def count_statements():
+    """Counts the statements executed by the current task while active.
+
+    The counter lives in a context variable, so concurrent requests are
+    counted separately. Usage::
+
+        with count_statements() as counter:
+            await ExpenseService.add_expense(session, expense, user_id)
+        counter.assert_at_most(2, "add_expense")
+    """
+    counter = StatementCounter()
+    token = _current_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _current_counter.reset(token)
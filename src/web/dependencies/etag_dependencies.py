@@ -0,0 +1,64 @@
+import hashlib
+from urllib.parse import urlencode
+
+from fastapi import Request, Response
+
+from src.data import data_versions_enabled
+from src.service import UserService
+from src.utils import NotModified
+from .user_dependencies import read_db_dependency, user_dependency
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def build_etag(user_id: int, version: int, request: Request) -> str:
+    """Derives a weak ETag from the user's data version and the request URL."""
+    query = urlencode(sorted(request.query_params.multi_items()))
+    digest = hashlib.blake2b(
+        f"{request.url.path}?{query}".encode(), digest_size=8
+    ).hexdigest()
+    return f'W/"{user_id}-{version}-{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Compares an `If-None-Match` header with `etag`, ignoring weakness."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+async def check_etag(
+    request: Request,
+    response: Response,
+    session: read_db_dependency,
+    user: user_dependency,
+):
+    """Answers a conditional GET with 304 when the user's data is unchanged.
+
+    Costs one primary-key lookup of the user's data version; on a match the
+    endpoint, its queries and the response serialization are skipped.
+    Otherwise the ETag is added to the endpoint's response, and the version
+    is kept in `request.state.data_version` for the endpoint to check
+    cached data against.
+    """
+    if not data_versions_enabled():
+        return
+
+    version = await UserService.get_data_version(session, user.id)
+    if version is None:
+        return
+    request.state.data_version = version
+
+    headers = {
+        "ETag": build_etag(user.id, version, request),
+        "Cache-Control": CACHE_CONTROL,
+    }
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        raise NotModified(headers)
+    response.headers.update(headers)
@@ -8,10 +8,11 @@ from jose import JWTError, jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
-from src.service import UserService
-from src.schema import UserLogin, UserDisplay
+from src.service import UserService, revocation_denylist
+from src.schema import UserLogin, CurrentUser
 from src.utils import settings, Unauthorized
-from src.data import AccessToken, User, get_db
+from src.utils.metrics import auth_token_checks, timed_phase
+from src.data import AccessToken, TokenRevocation, get_db, get_read_db
 
 
 SECRET_KEY = settings.SECRET_KEY
@@ -21,6 +22,7 @@ TOKEN_COOKIE_NAME = settings.TOKEN_COOKIE_NAME
 CSRF_TOKEN_SECRET = settings.CSRF_TOKEN_SECRET
 
 db_dependency = Annotated[AsyncSession, Depends(get_db)]
+read_db_dependency = Annotated[AsyncSession, Depends(get_read_db)]
 
 api_key_cookie = APIKeyCookie(name=TOKEN_COOKIE_NAME)
 
@@ -51,7 +53,7 @@ async def generate_token(
         if not user:
             raise Unauthorized("Invalid credentials")
 
-        access_token = create_access_token({"sub": user.username})
+        access_token = create_access_token({"sub": user.username, "uid": user.id})
         decoded_token = jwt.decode(
             access_token, SECRET_KEY, algorithms=[ALGORITHM], audience="tracker-ui"
         )
@@ -85,40 +87,58 @@ async def generate_token(
 
 
 async def get_current_user(
-    session: db_dependency,
+    session: read_db_dependency,
     token: str = Depends(api_key_cookie),
-) -> UserDisplay:
-    """Retrieves the current user from a JWT token."""
-    try:
-        payload = jwt.decode(
-            token, SECRET_KEY, algorithms=[ALGORITHM], audience="tracker-ui"
-        )
-
-        username: str = payload.get("sub")
-        jti: str = payload.get("jti")
-        if not username or not jti:
-            raise Unauthorized("Could not validate credentials")
-
-        query = select(AccessToken).where(AccessToken.id == jti)
-        result = await session.execute(query)
-        token: AccessToken | None = result.scalar_one_or_none()
-
-        if not token and not token.is_revoked:
-            raise Unauthorized("Token has been revoked")
-
-        user: User = token.user
-        if not user:
-            raise Unauthorized("User not found")
-
-        return UserDisplay.model_validate(user)
-    except Unauthorized as e:
-        raise e
-    except JWTError:
-        raise Unauthorized("Invalid token")
+) -> CurrentUser:
+    """Retrieves the current user from a JWT token.
+
+    A token that is not on the revocation denylist is accepted on its
+    claims alone, without a database round trip. Tokens issued without a
+    `uid` claim, or checked before the denylist is loaded, are looked up.
+    """
+    with timed_phase("auth"):
+        try:
+            payload = jwt.decode(
+                token, SECRET_KEY, algorithms=[ALGORITHM], audience="tracker-ui"
+            )
+
+            username: str = payload.get("sub")
+            jti: str = payload.get("jti")
+            user_id = payload.get("uid")
+            if not username or not jti:
+                raise Unauthorized("Could not validate credentials")
+
+            if revocation_denylist.is_revoked(jti):
+                auth_token_checks.inc(source="denylist")
+                raise Unauthorized("Token has been revoked")
+
+            if isinstance(user_id, int) and revocation_denylist.loaded:
+                auth_token_checks.inc(source="claims")
+                return CurrentUser(id=user_id, username=username)
+
+            auth_token_checks.inc(source="database")
+            query = select(AccessToken.user_id, AccessToken.is_revoked).where(
+                AccessToken.id == jti
+            )
+            result = await session.execute(query)
+            token = result.one_or_none()
+
+            if not token or token.is_revoked:
+                raise Unauthorized("Token has been revoked")
+
+            return CurrentUser(id=token.user_id, username=username)
+        except Unauthorized as e:
+            raise e
+        except JWTError:
+            raise Unauthorized("Invalid token")
 
 
 async def revoke_token(session: AsyncSession, token: str = Depends(api_key_cookie)):
-    """Marks a token as revoked in the database."""
+    """Marks a token as revoked in the database and on the denylist.
+
+    The revocation is also appended to the revocation log, from which other
+    processes update their denylists.
+    """
     try:
         payload = jwt.decode(
             token, SECRET_KEY, algorithms=[ALGORITHM], audience="tracker-ui"
@@ -131,11 +151,18 @@ async def revoke_token(session: AsyncSession, token: str = Depends(api_key_cooki
 
         if db_token:
             db_token.is_revoked = True
-            await session.commit()
+        session.add(
+            TokenRevocation(
+                jti=jti,
+                expires_at=datetime.fromtimestamp(payload["exp"], timezone.utc),
+            )
+        )
+        await session.commit()
+        revocation_denylist.add(jti, payload["exp"])
 
         return {"message": "You've been successfully logged out"}
     except JWTError:
         raise Unauthorized("Invalid token")
 
 
-user_dependency = Annotated[UserDisplay, Depends(get_current_user)]
+user_dependency = Annotated[CurrentUser, Depends(get_current_user)]
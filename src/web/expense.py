@@ -1,19 +1,109 @@
-from fastapi import APIRouter, HTTPException, status, Path, Query, Form
-from typing import List, Dict
+import csv
+import io
+import json
+from datetime import date, datetime
+
+from fastapi import (
+    APIRouter,
+    HTTPException,
+    Depends,
+    status,
+    Path,
+    Query,
+    Form,
+    Request,
+    Response,
+)
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from typing import Annotated, List, Dict, Literal, Optional
 
 from src.schema import (
     ExpenseCreate,
+    BulkExpenseResult,
     ExpenseUpdate,
     ExpenseDisplay,
     ExpenseListResponse,
     FilteredExpenses,
     FilteredExpenseCategory,
     ExpenseCategoryDisplay,
+    ExpenseStats,
+    ExpenseAnalytics,
+    ExpenseQuery,
+    ExpenseQueryResult,
 )
+from src.data import AsyncReadSessionLocal
 from src.service import ExpenseService
-from .dependencies.user_dependencies import db_dependency, user_dependency
+from src.utils import BadRequest, UnprocessableEntity, settings, fast_response
+from .middleware import TimedRoute
+from .dependencies.user_dependencies import (
+    db_dependency,
+    read_db_dependency,
+    user_dependency,
+)
+from .dependencies.etag_dependencies import check_etag
+
+router = APIRouter(
+    prefix="/expense",
+    tags=["Expense Management Endpoints"],
+    route_class=TimedRoute,
+)
+
+EXPENSE_FIELDS = tuple(ExpenseDisplay.model_fields)
 
-router = APIRouter(prefix="/expense", tags=["Expense Management Endpoints"])
+
+def expense_fields(
+    fields: Optional[str] = Query(
+        None,
+        max_length=200,
+        description="Comma-separated expense fields to return, "
+        "e.g. `id,amount,created_at`. Defaults to all of them.",
+    ),
+) -> tuple | None:
+    """Parses `fields=` into expense fields, in `ExpenseDisplay` order."""
+    if fields is None:
+        return None
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested.difference(EXPENSE_FIELDS)
+    if unknown:
+        raise BadRequest(
+            f"Unknown fields: {', '.join(sorted(unknown))}. "
+            f"Choose from {', '.join(EXPENSE_FIELDS)}."
+        )
+    if not requested:
+        raise BadRequest(f"No fields given. Choose from {', '.join(EXPENSE_FIELDS)}.")
+    if requested.issuperset(EXPENSE_FIELDS):
+        return None
+    return tuple(field for field in EXPENSE_FIELDS if field in requested)
+
+
+fields_dependency = Annotated[tuple | None, Depends(expense_fields)]
+
+
+def expense_query(
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    category_id: List[int] = Query([], description="Repeat to match any of them"),
+    min_amount: Optional[float] = Query(None),
+    max_amount: Optional[float] = Query(None),
+    sort: Literal["-created_at", "created_at", "-amount", "amount"] = Query(
+        "-created_at"
+    ),
+    summary: bool = Query(False),
+) -> ExpenseQuery:
+    """Collects the filters of `GET /expense/query`."""
+    try:
+        return ExpenseQuery(
+            start=start,
+            end=end,
+            category_ids=category_id,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            sort=sort,
+            summary=summary,
+        )
+    except ValidationError as e:
+        raise UnprocessableEntity("; ".join(error["msg"] for error in e.errors()))
 
 
 @router.post("/", response_model=ExpenseDisplay, status_code=status.HTTP_201_CREATED)
@@ -24,6 +114,84 @@ async def add_expense(db: db_dependency, user: user_dependency, expense: Expense
         raise e
 
 
+async def _iter_ndjson_lines(request: Request):
+    """Yields the lines of a streamed NDJSON body as they arrive."""
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
+def _parse_bulk_item(line: int, item, expenses: list, errors: list):
+    try:
+        expenses.append(ExpenseCreate.model_validate(item))
+    except ValidationError as e:
+        detail = "; ".join(
+            f"{'.'.join(str(loc) for loc in error['loc']) or 'item'}: {error['msg']}"
+            for error in e.errors()
+        )
+        errors.append({"line": line, "detail": detail})
+
+
+@router.post(
+    "/bulk", response_model=BulkExpenseResult, status_code=status.HTTP_201_CREATED
+)
+async def add_expenses_in_bulk(
+    db: db_dependency, user: user_dependency, request: Request
+):
+    """Adds many expenses at once.
+
+    Accepts either a JSON array of expenses or an NDJSON body
+    (`application/x-ndjson`) with one expense per line. Invalid lines are
+    reported back and the valid ones are still inserted.
+    """
+    try:
+        expenses, errors = [], []
+        content_type = request.headers.get("content-type", "")
+
+        if content_type.startswith(("application/x-ndjson", "application/jsonl")):
+            line = 0
+            async for raw_line in _iter_ndjson_lines(request):
+                line += 1
+                if not raw_line.strip():
+                    continue
+                if len(expenses) + len(errors) >= settings.BULK_MAX_ROWS:
+                    raise BadRequest(
+                        f"At most {settings.BULK_MAX_ROWS} expenses per request."
+                    )
+                try:
+                    item = json.loads(raw_line)
+                except ValueError:
+                    errors.append({"line": line, "detail": "Invalid JSON"})
+                    continue
+                _parse_bulk_item(line, item, expenses, errors)
+        else:
+            try:
+                items = await request.json()
+            except ValueError:
+                raise BadRequest("Request body is not valid JSON.")
+            if not isinstance(items, list):
+                raise BadRequest("Expected a JSON array of expenses.")
+            if len(items) > settings.BULK_MAX_ROWS:
+                raise BadRequest(
+                    f"At most {settings.BULK_MAX_ROWS} expenses per request."
+                )
+            for line, item in enumerate(items, start=1):
+                _parse_bulk_item(line, item, expenses, errors)
+
+        inserted = 0
+        if expenses:
+            inserted = await ExpenseService.bulk_add_expenses(db, expenses, user.id)
+
+        return {"inserted": inserted, "failed": len(errors), "errors": errors}
+    except HTTPException as e:
+        raise e
+
+
 @router.put("/{expense_id}", response_model=ExpenseDisplay)
 async def update_expense(
     db: db_dependency,
@@ -49,53 +217,228 @@ async def delete_expense(
         raise e
 
 
-@router.get("/", response_model=ExpenseListResponse)
+@router.get("/", response_model=ExpenseListResponse, dependencies=[Depends(check_etag)])
 async def read_all_expenses(
-    db: db_dependency,
+    db: read_db_dependency,
     user: user_dependency,
+    response: Response,
     limit: int = Query(10, ge=1, le=100),
     skip: int = Query(0, ge=0),
+    paginate: Literal["offset", "cursor"] = Query("offset"),
+    cursor: Optional[str] = Query(None, max_length=512),
+    include_total: bool = Query(False),
+    fields: fields_dependency = None,
 ):
     try:
-        return await ExpenseService.get_all_expenses(db, user.id, limit, skip)
+        if paginate == "cursor" or cursor:
+            result = await ExpenseService.get_expenses_by_cursor(
+                db, user.id, limit, cursor, fields, include_total
+            )
+        else:
+            result = await ExpenseService.get_all_expenses(
+                db, user.id, limit, skip, fields
+            )
+        return fast_response(result, response, sparse=fields is not None)
+    except HTTPException as e:
+        raise e
+
+
+@router.get(
+    "/query", response_model=ExpenseQueryResult, dependencies=[Depends(check_etag)]
+)
+async def query_expenses(
+    db: read_db_dependency,
+    user: user_dependency,
+    response: Response,
+    filters: Annotated[ExpenseQuery, Depends(expense_query)],
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, max_length=512),
+    fields: fields_dependency = None,
+):
+    """Filters, sorts and pages expenses.
+
+    Takes a `from`/`to` date range, any number of `category_id` values and
+    `min_amount`/`max_amount`, sorted by `sort` (`-created_at`, `created_at`,
+    `-amount` or `amount`). Page with `limit` and the returned cursors, and
+    add `summary=true` for the count and total of every match.
+    """
+    try:
+        result = await ExpenseService.query_expenses(
+            db, user.id, filters, limit, cursor, fields
+        )
+        return fast_response(result, response, sparse=fields is not None)
+    except HTTPException as e:
+        raise e
+
+
+EXPORT_COLUMNS = ["id", "description", "amount", "category", "created_at", "updated_at"]
+
+
+def _export_values(row) -> tuple:
+    id, description, amount, category, created_at, updated_at = row
+    return (
+        id,
+        description,
+        amount,
+        category,
+        created_at.isoformat(),
+        updated_at.isoformat(),
+    )
+
+
+async def _export_expenses(user_id: int, format: str, start, end):
+    """Streams a user's expenses as CSV or NDJSON chunks.
+
+    Uses its own session, since the response body is produced after the
+    request's dependencies may already have been cleaned up.
+    """
+    if format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        yield buffer.getvalue()
+
+    async with AsyncReadSessionLocal() as session:
+        async for batch in ExpenseService.stream_expenses(session, user_id, start, end):
+            if format == "csv":
+                buffer.seek(0)
+                buffer.truncate()
+                writer.writerows(_export_values(row) for row in batch)
+                yield buffer.getvalue()
+            else:
+                yield "".join(
+                    json.dumps(dict(zip(EXPORT_COLUMNS, _export_values(row)))) + "\n"
+                    for row in batch
+                )
+
+
+@router.get("/export")
+async def export_expenses(
+    user: user_dependency,
+    format: Literal["csv", "ndjson"] = Query("csv"),
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+):
+    try:
+        media_type = "text/csv" if format == "csv" else "application/x-ndjson"
+        return StreamingResponse(
+            _export_expenses(user.id, format, start, end),
+            media_type=media_type,
+            headers={
+                "Content-Disposition": f'attachment; filename="expenses.{format}"'
+            },
+        )
     except HTTPException as e:
         raise e
 
 
 @router.get("/search", response_model=List[ExpenseDisplay])
 async def search_expenses_with_description(
-    db: db_dependency,
+    db: read_db_dependency,
     user: user_dependency,
+    response: Response,
     description: str = Query(None, max_length=50),
+    limit: int = Query(20, ge=1, le=100),
+    skip: int = Query(0, ge=0),
+    fields: fields_dependency = None,
 ):
     try:
-        return await ExpenseService.search_expenses_by_description(
-            db, user.id, description
+        result = await ExpenseService.search_expenses_by_description(
+            db, user.id, description, limit, skip, fields
         )
+        return fast_response(result, response, sparse=fields is not None)
     except HTTPException as e:
         raise e
 
 
-@router.get("/weekly", response_model=FilteredExpenses)
+@router.get(
+    "/weekly", response_model=FilteredExpenses, response_model_exclude_none=True
+)
 async def filter_expenses_by_last_weeks(
-    db: db_dependency,
+    db: read_db_dependency,
     user: user_dependency,
+    response: Response,
     weeks: int = Query(1, ge=1),
+    summary_only: bool = Query(False),
+    bucket: Optional[Literal["day", "week"]] = Query(None),
+    fields: fields_dependency = None,
 ):
     try:
-        return await ExpenseService.filter_expenses_by_last_weeks(db, user.id, weeks)
+        result = await ExpenseService.filter_expenses_by_last_weeks(
+            db, user.id, weeks, summary_only, bucket, fields
+        )
+        return fast_response(result, response, sparse=fields is not None)
+    except HTTPException as e:
+        raise e
+
+
+YEAR_MONTH_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])$"
+
+
+@router.get("/stats", response_model=ExpenseStats)
+async def read_expense_stats(
+    db: read_db_dependency,
+    user: user_dependency,
+    start: Optional[str] = Query(None, alias="from", pattern=YEAR_MONTH_PATTERN),
+    end: Optional[str] = Query(None, alias="to", pattern=YEAR_MONTH_PATTERN),
+    category_id: Optional[int] = Query(None, ge=1),
+):
+    """Returns monthly and per-category totals for an inclusive month range.
+
+    Months are given as `YYYY-MM`.
+    """
+    try:
+        return await ExpenseService.get_expense_stats(
+            db, user.id, start, end, category_id
+        )
+    except HTTPException as e:
+        raise e
+
+
+@router.get(
+    "/analytics",
+    response_model=ExpenseAnalytics,
+    dependencies=[Depends(check_etag)],
+)
+async def read_expense_analytics(
+    db: read_db_dependency,
+    user: user_dependency,
+    response: Response,
+    bucket: Literal["day", "week", "month"] = Query("day"),
+    group_by: Optional[Literal["category"]] = Query(None),
+    start: Optional[date] = Query(None, alias="from"),
+    end: Optional[date] = Query(None, alias="to"),
+    window: int = Query(3, ge=1, le=90),
+):
+    """Returns per-bucket totals with running totals, moving averages and
+    changes from the previous bucket, for an inclusive range of UTC days.
+    """
+    if start and end and start > end:
+        raise UnprocessableEntity("`from` must not be after `to`")
+    try:
+        result = await ExpenseService.get_expense_analytics(
+            db, user.id, bucket, group_by, start, end, window
+        )
+        return fast_response(result, response)
     except HTTPException as e:
         raise e
 
 
 @router.get("/category/{category}", response_model=FilteredExpenseCategory)
 async def filter_expenses_by_category(
-    db: db_dependency,
+    db: read_db_dependency,
     user: user_dependency,
-    category: str,
+    response: Response,
+    category: str = Path(..., max_length=100),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, max_length=512),
+    fields: fields_dependency = None,
 ):
     try:
-        return await ExpenseService.filter_expenses_by_category(db, user.id, category)
+        result = await ExpenseService.filter_expenses_by_category(
+            db, user.id, category, limit, cursor, fields
+        )
+        return fast_response(result, response, sparse=fields is not None)
     except HTTPException as e:
         raise e
 
@@ -143,12 +486,18 @@ async def delete_expense_category(
         raise e
 
 
-@router.get("/category", response_model=List[ExpenseCategoryDisplay])
+@router.get(
+    "/category",
+    response_model=List[ExpenseCategoryDisplay],
+    dependencies=[Depends(check_etag)],
+)
 async def read_all_categories(
-    db: db_dependency,
+    db: read_db_dependency,
     user: user_dependency,
+    response: Response,
 ):
     try:
-        return await ExpenseService.read_all_expense_categories(db, user.id)
+        result = await ExpenseService.read_all_expense_categories(db, user.id)
+        return fast_response(result, response)
     except HTTPException as e:
         raise e
@@ -1,20 +1,51 @@
+import asyncio
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from starlette.middleware.cors import CORSMiddleware
 from starlette_csrf import CSRFMiddleware
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
-from src.data import init_db, engine
+from src.data import init_db, dispose_engines, database
+from src.service import (
+    revocation_denylist,
+    run_revocation_sync,
+    run_token_reaper,
+    sync_revocations,
+)
+from .middleware import RequestMetricsMiddleware
 from .user import router as user_router
 from .expense import router as expense_router
-from src.utils import InternalServerError, settings, get_settings
+from src.utils import (
+    InternalServerError,
+    settings,
+    get_settings,
+    principal_cache,
+    category_cache,
+    password_hasher,
+)
+from src.utils.metrics import metrics
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     get_settings.cache_clear()
     await init_db()
+    revocation_denylist.clear()
+    async with database.AsyncSessionLocal() as session:
+        await sync_revocations(session)
+
+    tasks = []
+    if settings.TOKEN_REAPER_INTERVAL_SECONDS > 0:
+        tasks.append(asyncio.create_task(run_token_reaper()))
+    if settings.REVOCATION_POLL_INTERVAL_SECONDS > 0:
+        tasks.append(asyncio.create_task(run_revocation_sync()))
     yield
-    await engine.dispose()
+    for task in tasks:
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    await dispose_engines()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -34,6 +65,90 @@ app.add_middleware(
     cookie_domain="localhost",
 )
 
+app.add_middleware(RequestMetricsMiddleware)
+
+
+def _collect_runtime_metrics():
+    """Reads pool, cache and password hasher state for `/metrics`."""
+    pools = {"primary": database.engine.pool}
+    if database.read_engine is not database.engine:
+        pools["read"] = database.read_engine.pool
+    pool_samples = []
+    for name, pool in pools.items():
+        if not hasattr(pool, "checkedout"):
+            continue
+        # QueuePool counts overflow from -size; only the excess is reported.
+        pool_samples += [
+            ({"engine": name, "state": "size"}, pool.size()),
+            ({"engine": name, "state": "checkedin"}, pool.checkedin()),
+            ({"engine": name, "state": "checkedout"}, pool.checkedout()),
+            ({"engine": name, "state": "overflow"}, max(pool.overflow(), 0)),
+        ]
+
+    caches = {"principal": principal_cache.stats(), "category": category_cache.stats()}
+    hasher = password_hasher.stats()
+    denylist = revocation_denylist.stats()
+    return [
+        ("db_pool_connections", "gauge", "Connection pool state.", pool_samples),
+        *(
+            (
+                f"cache_{stat}_total",
+                "counter",
+                f"In-process cache {stat}.",
+                [({"cache": name}, stats[stat]) for name, stats in caches.items()],
+            )
+            for stat in ("hits", "misses", "evictions")
+        ),
+        (
+            "cache_entries",
+            "gauge",
+            "Entries held by an in-process cache.",
+            [({"cache": name}, stats["size"]) for name, stats in caches.items()],
+        ),
+        (
+            "revocation_denylist_entries",
+            "gauge",
+            "Revoked, unexpired access tokens held in the denylist.",
+            [({}, denylist["size"])],
+        ),
+        (
+            "revocation_log_high_water_mark",
+            "gauge",
+            "Highest revocation log id applied to the denylist.",
+            [({}, denylist["high_water_mark"])],
+        ),
+        (
+            "password_hasher_requests",
+            "gauge",
+            "Password hashing requests waiting or running.",
+            [
+                ({"state": "pending"}, hasher["pending"]),
+                ({"state": "in_flight"}, hasher["in_flight"]),
+            ],
+        ),
+        (
+            "password_hasher_completed_total",
+            "counter",
+            "Password hashing requests completed.",
+            [({}, hasher["completed"])],
+        ),
+        (
+            "password_hasher_rejected_total",
+            "counter",
+            "Password hashing requests rejected because the queue was full.",
+            [({}, hasher["rejected"])],
+        ),
+        (
+            "password_hasher_seconds_total",
+            "counter",
+            "Time spent hashing and verifying passwords.",
+            [({}, hasher["total_seconds"])],
+        ),
+    ]
+
+
+metrics.register_collector(_collect_runtime_metrics)
+
 
 @app.get("/healthy")
 async def check_health():
@@ -43,5 +158,13 @@ async def check_health():
         raise InternalServerError()
 
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def read_metrics():
+    """Exposes the process' metrics in Prometheus text format."""
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 app.include_router(user_router)
 app.include_router(expense_router)
@@ -0,0 +1,73 @@
+import functools
+import time
+
+from fastapi.routing import APIRoute
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.utils.metrics import (
+    current_request_timings,
+    http_request_duration,
+    start_request_timings,
+)
+
+
+class RequestMetricsMiddleware:
+    """Times every HTTP request.
+
+    Adds a `Server-Timing` header with the time spent authenticating, in the
+    database and serializing the response, and records the full request,
+    body included, in the per-route latency histogram.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings = start_request_timings()
+        status = None
+
+        async def send_with_timing(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing", timings.server_timing(time.perf_counter())
+                )
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get(
+                "more_body", False
+            ):
+                http_request_duration.observe(
+                    time.perf_counter() - timings.started,
+                    method=scope["method"],
+                    route=getattr(scope.get("route"), "path", "unmatched"),
+                    status=status,
+                )
+
+        await self.app(scope, receive, send_with_timing)
+
+
+class TimedRoute(APIRoute):
+    """Route that notes when its endpoint returns.
+
+    The time between that and the response headers is reported as the
+    `serialize` phase of `Server-Timing`.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        @functools.wraps(endpoint)
+        async def timed_endpoint(*args, **kwargs):
+            try:
+                return await endpoint(*args, **kwargs)
+            finally:
+                timings = current_request_timings()
+                if timings is not None:
+                    timings.endpoint_finished = time.perf_counter()
+
+        super().__init__(path, timed_endpoint, **kwargs)
@@ -1,18 +1,21 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Response
+from fastapi import APIRouter, HTTPException, Depends, Request, status, Response
 from fastapi.security import OAuth2PasswordRequestForm
 from typing import Annotated
 
 from src.schema import UserDisplay, UserCreate
 from src.service import UserService
+from .middleware import TimedRoute
 from .dependencies.user_dependencies import (
     db_dependency,
+    read_db_dependency,
     user_dependency,
     generate_token,
     revoke_token,
     api_key_cookie,
 )
+from .dependencies.etag_dependencies import check_etag
 
-router = APIRouter(tags=["User Endpoints"])
+router = APIRouter(tags=["User Endpoints"], route_class=TimedRoute)
 
 
 @router.post(
@@ -37,10 +40,14 @@ async def login(
         raise e
 
 
-@router.get("/users/me")
-async def read_current_user(current_user: user_dependency):
+@router.get("/users/me", response_model=UserDisplay, dependencies=[Depends(check_etag)])
+async def read_current_user(
+    request: Request, db: read_db_dependency, current_user: user_dependency
+):
     try:
-        return current_user
+        return await UserService.read_user_profile(
+            db, current_user.id, getattr(request.state, "data_version", None)
+        )
     except HTTPException as e:
         raise e
 
@@ -49,8 +56,9 @@ async def read_current_user(current_user: user_dependency):
 async def logout(
     db: db_dependency,
     current_user: user_dependency,
+    token: str = Depends(api_key_cookie),
 ):
     try:
-        return await revoke_token(db, api_key_cookie)
+        return await revoke_token(db, token)
     except HTTPException as e:
         raise e